@@ -6,6 +6,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.cache import cache
+from django.db import transaction
 from django.http import Http404
 from django.shortcuts import redirect
 from django.shortcuts import render
@@ -61,11 +62,13 @@ def register(request):
     if request.method == 'POST':
         form = RegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            Task.objects.create(
-                name='SendEmailToActivateAccountTask',
-                data={'domain': get_current_site(request).domain, 'user': user.pk},
-            )
+            with transaction.atomic():
+                user = form.save()
+                Task.objects.enqueueOnCommit(
+                    name='SendEmailToActivateAccountTask',
+                    data={'domain': get_current_site(request).domain, 'user': user.pk},
+                    dedupKey=user.pk,
+                )
 
             messages.info(
                 request, 'We\'ve sent you an activation link. Please check your email.'
@@ -122,9 +125,10 @@ def passwordForgotten(request):
             user = None
 
         if user is not None:
-            Task.objects.create(
+            Task.objects.enqueueOnCommit(
                 name='SendEmailToResetPasswordTask',
                 data={'domain': get_current_site(request).domain, 'user': user.pk},
+                dedupKey=user.pk,
             )
 
         messages.info(
@@ -128,7 +128,7 @@ class ResponseAdmin(admin.ModelAdmin):
         'id',
         'url',
         'answer',
-        'choices',
+        'selectedChoices',
         'trueOrFalse',
         'question__url',
         'question__content',
@@ -1,7 +1,4 @@
-import random
-
 from django.contrib import messages
-from django.core.cache import cache
 from django.db import transaction
 from django.urls import reverse
 from rest_framework import status
@@ -13,6 +10,7 @@ from core.models import (
     Quiz,
     Response
 )
+from onequiz.operations.snapshotOperations import QuizAttemptSnapshot
 
 
 class QuizAttemptCommenceApiVersion1(APIView):
@@ -55,22 +53,69 @@ class QuizAttemptCommenceApiVersion1(APIView):
                 user=user,
                 status=QuizAttempt.Status.IN_PROGRESS
             )
-            responseList = [
+            responseList = quizAttempt.orderResponses(
                 Response(question=question, quizAttempt=quizAttempt)
                 for question in quiz.questions.all()
-            ]
+            )
+            for orderNo, response in enumerate(responseList, start=1):
+                response.orderNo = orderNo
             Response.objects.bulk_create(responseList)
-            if quiz.inRandomOrder:
-                random.shuffle(responseList)
 
-            cache.set(
-                f'quiz-attempt-v1-{quizAttempt.url}',
-                [response.url for response in responseList],
-                quizAttempt.quiz.quizDuration * 60 + 30
-            )
+        QuizAttemptSnapshot(quizAttempt, responseList).store()
 
         response = {
             'success': True,
             'redirectUrl': reverse('core:quiz-attempt-view-v1', kwargs={'url': quizAttempt.url})
         }
         return DRFResponse(response, status=status.HTTP_200_OK)
+
+
+class QuizAttemptResponseAutosaveApiVersion1(APIView):
+    def post(self, request, *args, **kwargs):
+        if not isinstance(self.request.data, dict):
+            response = {
+                'success': False,
+                'message': 'Invalid responses.'
+            }
+            return DRFResponse(response, status=status.HTTP_400_BAD_REQUEST)
+
+        snapshot = QuizAttemptSnapshot.load(self.request.data.get('url'))
+
+        if snapshot is None or snapshot.quizAttempt.user_id != self.request.user.id:
+            response = {
+                'success': False,
+                'message': 'Quiz attempt not found.'
+            }
+            return DRFResponse(response, status=status.HTTP_404_NOT_FOUND)
+
+        quizAttempt = snapshot.quizAttempt
+        if quizAttempt.hasQuizEnded() or quizAttempt.status not in quizAttempt.getEditStatues():
+            response = {
+                'success': False,
+                'message': 'This quiz attempt can no longer be changed.'
+            }
+            return DRFResponse(response, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = self.request.data.get('responses')
+        if not isinstance(changes, dict) or any(snapshot.getResponse(url) is None for url in changes):
+            response = {
+                'success': False,
+                'message': 'Invalid responses.'
+            }
+            return DRFResponse(response, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            saved = snapshot.setAnswers(changes)
+        except ValueError as e:
+            response = {
+                'success': False,
+                'message': str(e)
+            }
+            return DRFResponse(response, status=status.HTTP_400_BAD_REQUEST)
+
+        response = {
+            'success': True,
+            'saved': saved,
+            'version': snapshot.version
+        }
+        return DRFResponse(response, status=status.HTTP_200_OK)
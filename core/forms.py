@@ -2,6 +2,7 @@ from django import forms
 
 from core.models import Quiz, Question
 from onequiz.operations import generalOperations
+from onequiz.operations.answerKeyOperations import QuizAnswerKey
 
 
 class QuizForm(forms.Form):
@@ -474,6 +475,7 @@ class EssayQuestionCreateForm(QuestionForm):
             questionType=Question.Type.ESSAY,
             answer=self.cleaned_data.get('answer'),
         )
+        QuizAnswerKey.invalidate(self.quiz.id)
         return question
 
 
@@ -549,6 +551,7 @@ class MultipleChoiceQuestionCreateForm(QuestionForm):
             choiceType=self.cleaned_data.get('choiceType'),
             choices=self.cleaned_data.get('choices', [])
         )
+        QuizAnswerKey.invalidate(self.quiz.id)
         return question
 
 
@@ -584,6 +587,7 @@ class TrueOrFalseQuestionCreateForm(QuestionForm):
             questionType=Question.Type.TRUE_OR_FALSE,
             trueOrFalse=self.cleaned_data.get('trueOrFalse')
         )
+        QuizAnswerKey.invalidate(self.quiz.id)
         return question
 
 
@@ -630,7 +634,9 @@ class EssayQuestionUpdateForm(QuestionForm):
         self.question.explanation = self.cleaned_data.get('explanation')
         self.question.mark = self.cleaned_data.get('mark')
         self.question.answer = self.cleaned_data.get('answer')
+        self.question.versionNo = (self.question.versionNo or 0) + 1
         self.question.save()
+        QuizAnswerKey.invalidate(self.question.quiz_id)
         return self.question
 
 
@@ -672,7 +678,9 @@ class TrueOrFalseQuestionUpdateForm(QuestionForm):
         self.question.explanation = self.cleaned_data.get('explanation')
         self.question.mark = self.cleaned_data.get('mark')
         self.question.trueOrFalse = self.cleaned_data.get('trueOrFalse')
+        self.question.versionNo = (self.question.versionNo or 0) + 1
         self.question.save()
+        QuizAnswerKey.invalidate(self.question.quiz_id)
         return self.question
 
 
@@ -758,7 +766,9 @@ class MultipleChoiceQuestionUpdateForm(QuestionForm):
         self.question.choiceOrder = self.cleaned_data.get('choiceOrder')
         self.question.choiceType = self.cleaned_data.get('choiceType')
         self.question.choices = self.cleaned_data.get('choices', [])
+        self.question.versionNo = (self.question.versionNo or 0) + 1
         self.question.save()
+        QuizAnswerKey.invalidate(self.question.quiz_id)
         return self.question
 
 
@@ -874,8 +884,11 @@ class MultipleChoiceQuestionResponseForm(BaseResponseForm):
 
         self.fields[fieldName] = forms.MultipleChoiceField(
             label='Select the correct answer(s).' if self.allowEdit else 'Your Answer',
-            choices=[(choice['id'], choice['content']) for choice in response.choices],
-            initial=[choice['id'] for choice in response.choices if choice['isChecked']],
+            choices=[
+                (choice['id'], choice['content'])
+                for choice in response.question.orderAnswers(response.quizAttempt.seed)
+            ],
+            initial=response.selectedChoices,
             widget=widget
         )
 
@@ -888,7 +901,10 @@ class MultipleChoiceQuestionResponseForm(BaseResponseForm):
             widget = forms.CheckboxSelectMultiple(attrs=style)
         self.fields[f'systemAnswer_{generalOperations.generateRandomString(3)}'] = forms.MultipleChoiceField(
             label='System Answer',
-            choices=[(choice['id'], choice['content']) for choice in response.question.choices],
-            initial=[choice['id'] for choice in response.question.choices if choice['isChecked']],
+            choices=[
+                (choice['id'], choice['content'])
+                for choice in response.question.orderAnswers(response.quizAttempt.seed)
+            ],
+            initial=response.question.getCorrectChoiceIds(),
             widget=widget
         )
@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand
+
+from core.models import QuizAttempt
+
+
+class Command(BaseCommand):
+    help = 'Store the deadline on quiz attempts created before it was precomputed'
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=Command.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batchSize = options['batch_size']
+        updated = 0
+
+        while True:
+            quizAttempts = list(
+                QuizAttempt.objects.filter(deadline__isnull=True)
+                .select_related('quiz')
+                .only('id', 'createdDttm', 'quiz__quizDuration')[:batchSize]
+            )
+            if not quizAttempts:
+                break
+
+            for quizAttempt in quizAttempts:
+                quizAttempt.deadline = quizAttempt.calculateDeadline()
+
+            QuizAttempt.objects.bulk_update(quizAttempts, ['deadline'])
+            updated += len(quizAttempts)
+            self.stdout.write(f'Updated {updated} quiz attempts...')
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} quiz attempts in total.'))
@@ -0,0 +1,30 @@
+from django.core.management import BaseCommand
+
+from core.models import Response
+
+
+class Command(BaseCommand):
+    help = 'Replace the cloned choice documents stored on responses with the selected choice ids'
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=Command.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        batchSize = options['batch_size']
+        compacted = 0
+
+        while True:
+            responses = list(Response.objects.filter(choices__isnull=False).only('id', 'choices')[:batchSize])
+            if not responses:
+                break
+
+            for response in responses:
+                response.selectedChoices = [choice['id'] for choice in response.choices or [] if choice['isChecked']]
+                response.choices = None
+
+            Response.objects.bulk_update(responses, ['selectedChoices', 'choices'])
+            compacted += len(responses)
+            self.stdout.write(f'Compacted {compacted} responses...')
+
+        self.stdout.write(self.style.SUCCESS(f'Compacted {compacted} responses in total.'))
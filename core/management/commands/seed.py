@@ -61,7 +61,7 @@ class Command(BaseCommand):
                 if question.questionType == Question.Type.ESSAY:
                     rr.answer = faker.paragraph()
                 elif question.questionType == Question.Type.MULTIPLE_CHOICE:
-                    rr.choices = question.cloneAndCleanChoices()
+                    rr.selectedChoices = random.sample(question.getChoiceIds(), 1)
                 elif question.questionType == Question.Type.TRUE_OR_FALSE:
                     rr.trueOrFalse = random.choice(Question.TrueOrFalse.values)
 
@@ -0,0 +1,32 @@
+from django.core.management import BaseCommand
+from django.db import connection
+
+from core.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Build the full-text search document of quizzes saved before it was maintained'
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=Command.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('Quiz search documents are only kept on PostgreSQL.'))
+            return
+
+        batchSize = options['batch_size']
+        lastId = 0
+        updated = 0
+
+        while True:
+            quizIds = list(Quiz.objects.filter(id__gt=lastId).order_by('id').values_list('id', flat=True)[:batchSize])
+            if not quizIds:
+                break
+
+            updated += Quiz.objects.refreshSearchVectors(quizIds)
+            lastId = quizIds[-1]
+            self.stdout.write(f'Updated {updated} quizzes...')
+
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} quizzes in total.'))
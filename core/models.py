@@ -1,10 +1,12 @@
-import copy
 import datetime
+import random
 import uuid
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import connections, models
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -16,6 +18,10 @@ def generateModelUrl():
     return uuid.uuid4().hex[:8]
 
 
+def generateSeed():
+    return random.randint(1, 2 ** 31 - 1)
+
+
 class BaseModel(models.Model):
     createdDttm = models.DateTimeField(default=timezone.now)
     modifiedDttm = models.DateTimeField(auto_now=True)
@@ -84,19 +90,54 @@ class Quiz(BaseModel):
     isDraft = models.BooleanField(default=False)
     enableAutoMarking = models.BooleanField(default=False)
     creator = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quizCreator')
+    # weighted full-text document of name, topic, subject and description, only maintained on PostgreSQL
+    searchVector = SearchVectorField(null=True, blank=True, editable=False)
+
+    SEARCH_CONFIG = 'english'
+    SEARCH_FIELDS = {'name', 'topic', 'subject', 'description'}
 
     class Meta:
         indexes = [
             models.Index(fields=['name'], name='idx-quiz-name'),
             models.Index(fields=['url'], name='idx-quiz-url'),
             models.Index(fields=['subject'], name='idx-quiz-subject'),
-            models.Index(fields=['topic'], name='idx-quiz-topic')
+            models.Index(fields=['topic'], name='idx-quiz-topic'),
+            GinIndex(fields=['searchVector'], name='idx-quiz-search-vector'),
         ]
 
-    def getQuestions(self, shuffleQuestions=False):
+    class ModelManager(models.Manager):
+        def bulk_create(self, objs, *args, **kwargs):
+            quizzes = super().bulk_create(objs, *args, **kwargs)
+            self.refreshSearchVectors([quiz.pk for quiz in quizzes if quiz.pk is not None])
+            return quizzes
+
+        def refreshSearchVectors(self, quizIds):
+            """Rebuild the search document of these quizzes. Other databases have none and search with icontains."""
+            if connections[self.db].vendor != 'postgresql' or not quizIds:
+                return 0
+            return self.filter(id__in=quizIds).update(searchVector=Quiz.getSearchVector())
+
+    objects = ModelManager()
+
+    @staticmethod
+    def getSearchVector():
+        return (
+            SearchVector('name', weight='A', config=Quiz.SEARCH_CONFIG)
+            + SearchVector('topic', 'subject', weight='B', config=Quiz.SEARCH_CONFIG)
+            + SearchVector('description', weight='C', config=Quiz.SEARCH_CONFIG)
+        )
+
+    def save(self, *args, **kwargs):
+        super(Quiz, self).save(*args, **kwargs)
+        updateFields = kwargs.get('update_fields')
+        if updateFields is None or Quiz.SEARCH_FIELDS.intersection(updateFields):
+            Quiz.objects.refreshSearchVectors([self.pk])
+
+    def getQuestions(self, shuffleQuestions=False, seed=None):
         questionList = self.questions.all()
         if shuffleQuestions:
-            questionList = questionList.order_by('?')
+            questionList = list(questionList.order_by('id'))
+            random.Random(seed).shuffle(questionList)
         return questionList
 
     def getUrl(self):
@@ -150,26 +191,21 @@ class Question(BaseModel):
         verbose_name = 'Question'
         verbose_name_plural = 'Questions'
 
-    def orderAnswers(self, queryset):
+    def orderAnswers(self, seed=None):
+        """Return the choices in display order, a random order is derived from the seed so it can be repeated."""
         if self.questionType == self.Type.NONE:
             raise ValueError('Question type cannot be NONE')
 
-        if self.questionType != self.Type.MULTIPLE_CHOICE:
-            return queryset
+        choices = list(self.choices or [])
+        if self.questionType == self.Type.MULTIPLE_CHOICE and self.choiceOrder == self.ChoiceOrder.RANDOM:
+            random.Random(f'{seed}-{self.id}').shuffle(choices)
+        return choices
 
-        if self.choiceOrder == self.ChoiceOrder.SEQUENTIAL:
-            return queryset.order_by('id')
-        if self.choiceOrder == self.ChoiceOrder.RANDOM:
-            return queryset.order_by('?')
-        if self.choiceOrder == self.ChoiceOrder.NONE:
-            return queryset.order_by()
-        return queryset
+    def getChoiceIds(self):
+        return [choice['id'] for choice in self.choices or []]
 
-    def cloneAndCleanChoices(self):
-        clonedChoices = copy.deepcopy(self.choices)
-        for choice in clonedChoices:
-            choice['isChecked'] = False
-        return clonedChoices
+    def getCorrectChoiceIds(self):
+        return [choice['id'] for choice in self.choices or [] if choice['isChecked']]
 
 
 class QuizAttempt(BaseModel):
@@ -189,12 +225,16 @@ class QuizAttempt(BaseModel):
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='quizAttemptQuiz')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quizAttemptUser')
     status = models.CharField(max_length=30, choices=Status.choices, default=Status.NOT_ATTEMPTED)
+    seed = models.PositiveIntegerField(default=generateSeed)
+    # precomputed end time, so expired attempts can be found without joining the quiz duration
+    deadline = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['url'], name='idx-quiz-attempt-url'),
             models.Index(fields=['quiz'], name='idx-quiz-attempt-quiz'),
-            models.Index(fields=['user'], name='idx-quiz-attempt-user')
+            models.Index(fields=['user'], name='idx-quiz-attempt-user'),
+            models.Index(fields=['status', 'deadline'], name='idx-quiz-attempt-status-dl')
         ]
         verbose_name = 'Quiz Attempt'
         verbose_name_plural = 'Quiz Attempts'
@@ -205,8 +245,11 @@ class QuizAttempt(BaseModel):
     def getAttemptResultUrl(self):
         return reverse('core:quiz-attempt-result-view', kwargs={'url': self.url})
 
+    def calculateDeadline(self):
+        return self.createdDttm + datetime.timedelta(minutes=self.quiz.quizDuration)
+
     def getQuizEndTime(self, uiFormat=True):
-        endTime = (self.createdDttm + datetime.timedelta(minutes=self.quiz.quizDuration))
+        endTime = self.deadline or self.calculateDeadline()
         return endTime.strftime('%b %d, %Y %H:%M:%S') if uiFormat else endTime
 
     def hasQuizEnded(self):
@@ -222,31 +265,46 @@ class QuizAttempt(BaseModel):
         return (self.getQuizEndTime(False) - timezone.now()).total_seconds()
 
     def hasViewPermission(self, user):
-        if self.user == user:
+        if self.user_id == user.id:
             return True
 
-        if self.quiz.creator == user and self.status in self.getViewStatues():
+        if self.quiz.creator_id == user.id and self.status in self.getViewStatues():
             return True
 
         return False
 
     def getPermissionMode(self, user):
-        if self.user == user and not self.hasQuizEnded() and self.status in self.getEditStatues():
+        if self.user_id == user.id and not self.hasQuizEnded() and self.status in self.getEditStatues():
             mode = self.Mode.EDIT
-        elif self.quiz.creator == user and self.hasQuizEnded() and self.status in self.getViewStatues():
+        elif self.quiz.creator_id == user.id and self.hasQuizEnded() and self.status in self.getViewStatues():
             mode = self.Mode.MARK
-        elif self.user == user and self.hasQuizEnded() and self.status in self.getViewStatues():
+        elif self.user_id == user.id and self.hasQuizEnded() and self.status in self.getViewStatues():
             mode = self.Mode.VIEW
         else:
             raise NotImplementedError(f'Cannot find a permission mode for quiz attempt: {self.id}')
         return mode
 
     def getResponses(self, shuffle=False):
-        responsesList = self.responses.all()
+        responsesList = self.responses.order_by('question_id')
         if shuffle:
-            responsesList = responsesList.order_by('?')
+            responsesList = list(responsesList)
+            random.Random(self.seed).shuffle(responsesList)
+        return responsesList
+
+    def orderResponses(self, responses):
+        """Order already loaded responses the same way getResponses(shuffle=quiz.inRandomOrder) would."""
+        responsesList = sorted(responses, key=lambda response: response.question_id)
+        if self.quiz.inRandomOrder:
+            random.Random(self.seed).shuffle(responsesList)
         return responsesList
 
+    def save(self, *args, **kwargs):
+        if self.deadline is None:
+            self.deadline = self.calculateDeadline()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = [*kwargs['update_fields'], 'deadline']
+        super(QuizAttempt, self).save(*args, **kwargs)
+
 
 class Response(BaseModel):
     url = models.CharField(max_length=10, unique=True, editable=False, default=generateModelUrl)
@@ -259,15 +317,57 @@ class Response(BaseModel):
     answer = models.TextField(blank=True, null=True)
 
     # fields specific to multiple choice
+    selectedChoices = models.JSONField(blank=True, default=list)
+    # legacy copy of the question's choices with the selection flagged, emptied by the compactresponses command
     choices = models.JSONField(blank=True, null=True)
 
     # fields specific to true or false
     trueOrFalse = models.CharField(max_length=8, blank=True, null=True, choices=Question.TrueOrFalse.choices)
 
-    def save(self, *args, **kwargs):
-        if self.question.questionType == Question.Type.MULTIPLE_CHOICE and self.id is None:
-            self.choices = self.question.cloneAndCleanChoices()
-        super().save(*args, **kwargs)
+    def getAnswer(self):
+        if self.question.questionType == Question.Type.ESSAY:
+            return self.answer
+        if self.question.questionType == Question.Type.TRUE_OR_FALSE:
+            return self.trueOrFalse
+        if self.question.questionType == Question.Type.MULTIPLE_CHOICE:
+            return list(self.selectedChoices)
+        raise ValueError(f'Cannot get an answer for question type: {self.question.questionType}')
+
+    def setAnswer(self, answer):
+        """Apply a submitted answer and return the names of the fields that actually changed."""
+        if self.question.questionType == Question.Type.ESSAY:
+            if answer is not None and not isinstance(answer, str):
+                raise ValueError(f'Invalid essay answer for response: {self.url}')
+            if self.answer == answer:
+                return []
+            self.answer = answer
+            return ['answer']
+
+        if self.question.questionType == Question.Type.TRUE_OR_FALSE:
+            if answer is not None and answer not in Question.TrueOrFalse.values:
+                raise ValueError(f'Invalid true or false answer for response: {self.url}')
+            if self.trueOrFalse == answer:
+                return []
+            self.trueOrFalse = answer
+            return ['trueOrFalse']
+
+        if self.question.questionType == Question.Type.MULTIPLE_CHOICE:
+            isChoiceIdList = isinstance(answer, list) and all(isinstance(choiceId, str) for choiceId in answer)
+            if answer is not None and not isChoiceIdList:
+                raise ValueError(f'Invalid multiple choice answer for response: {self.url}')
+
+            choiceIds = self.question.getChoiceIds()
+            checkedOptionsIds = set(answer or [])
+            if not checkedOptionsIds.issubset(choiceIds):
+                raise ValueError(f'Invalid choices selected for response: {self.url}')
+
+            selectedChoices = [choiceId for choiceId in choiceIds if choiceId in checkedOptionsIds]
+            if self.selectedChoices == selectedChoices:
+                return []
+            self.selectedChoices = selectedChoices
+            return ['selectedChoices']
+
+        raise ValueError(f'Cannot set an answer for question type: {self.question.questionType}')
 
     class Meta:
         indexes = [
@@ -276,15 +376,6 @@ class Response(BaseModel):
         verbose_name = 'Response'
         verbose_name_plural = 'Responses'
 
-    class ModelManager(models.Manager):
-        def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
-            for obj in objs:
-                if obj.question.questionType == Question.Type.MULTIPLE_CHOICE and obj.id is None:
-                    obj.choices = obj.question.cloneAndCleanChoices()
-            return super().bulk_create(objs, batch_size, ignore_conflicts)
-
-    objects = ModelManager()
-
 
 class Result(BaseModel):
     quizAttempt = models.ForeignKey(QuizAttempt, on_delete=models.CASCADE, related_name='quizAttemptResults')
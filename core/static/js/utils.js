@@ -17,4 +17,13 @@ function startCountdown(seconds, elementId, onTimeout) {
     }
 
     updateCountdown();
-}
\ No newline at end of file
+}
+
+function debounce(callback, delay) {
+    let timeoutId = null;
+
+    return function (...args) {
+        clearTimeout(timeoutId);
+        timeoutId = setTimeout(() => callback.apply(this, args), delay);
+    };
+}
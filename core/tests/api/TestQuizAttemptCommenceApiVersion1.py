@@ -5,6 +5,7 @@ from django.urls import reverse
 
 from core.models import QuizAttempt, Response, Quiz
 from onequiz.operations import bakerOperations
+from onequiz.operations.snapshotOperations import QuizAttemptSnapshot, getSnapshotCacheKey
 from onequiz.tests.BaseTestAjax import BaseTestAjax
 
 
@@ -13,6 +14,7 @@ class QuizAttemptCommenceApiVersion1Test(BaseTestAjax):
         super(QuizAttemptCommenceApiVersion1Test, self).setUp(path)
         self.quiz = bakerOperations.createQuiz(self.user)
         self.quiz.isDraft = False
+        self.quiz.maxAttempt = 5
         self.quiz.save()
 
     def testWhenAQuizAttemptIsInProgressThenRedirectToAttemptView(self):
@@ -67,9 +69,9 @@ class QuizAttemptCommenceApiVersion1Test(BaseTestAjax):
         self.assertEqual(quizAttempt.count(), 1)
         self.assertEqual(len(responseList), len([question.url for question in questions]))
 
-        cacheList = cache.get(f'quiz-attempt-v1-{quizAttempt.first().url}')
+        snapshotUrls = QuizAttemptSnapshot.load(quizAttempt.first().url).responseUrls
         for item in responseList:
-            self.assertIn(item, cacheList)
+            self.assertIn(item, snapshotUrls)
 
     def testRandomOrderShufflingOfResponses(self):
         self.quiz.inRandomOrder = True
@@ -79,11 +81,23 @@ class QuizAttemptCommenceApiVersion1Test(BaseTestAjax):
         self.post({'quizId': self.quiz.id})
         quizAttempt = QuizAttempt.objects.get(quiz=self.quiz, user=self.user, status=QuizAttempt.Status.IN_PROGRESS)
         responses = Response.objects.filter(quizAttempt=quizAttempt)
-        cachedUrls = cache.get(f'quiz-attempt-v1-{quizAttempt.url}')
+        snapshotUrls = QuizAttemptSnapshot.load(quizAttempt.url).responseUrls
 
         actualUrls = [response.url for response in responses]
-        self.assertCountEqual(actualUrls, cachedUrls)
-        self.assertNotEqual(actualUrls, cachedUrls)
+        self.assertCountEqual(actualUrls, snapshotUrls)
+        self.assertEqual([response.url for response in quizAttempt.getResponses(shuffle=True)], snapshotUrls)
+
+    def testRandomOrderSurvivesCacheEviction(self):
+        self.quiz.inRandomOrder = True
+        self.quiz.save()
+        bakerOperations.createRandomQuestions(self.quiz, 5, True)
+
+        self.post({'quizId': self.quiz.id})
+        quizAttempt = QuizAttempt.objects.get(quiz=self.quiz, user=self.user, status=QuizAttempt.Status.IN_PROGRESS)
+        snapshotUrls = QuizAttemptSnapshot.load(quizAttempt.url).responseUrls
+
+        cache.delete(getSnapshotCacheKey(quizAttempt.url))
+        self.assertEqual(QuizAttemptSnapshot.load(quizAttempt.url).responseUrls, snapshotUrls)
 
     def testWhenExceptionOccurredDuringAtomicEnsureNoObjectsAreCreated(self):
         pass
@@ -0,0 +1,115 @@
+import json
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from core.models import QuizAttempt, Response, Question
+from onequiz.operations import bakerOperations
+from onequiz.operations.snapshotOperations import getSnapshotCacheKey
+from onequiz.tests.BaseTestAjax import BaseTestAjax
+
+
+class QuizAttemptResponseAutosaveApiVersion1Test(BaseTestAjax):
+    def setUp(self, path=reverse('core:quizAttemptResponseAutosaveApiVersion1')) -> None:
+        super(QuizAttemptResponseAutosaveApiVersion1Test, self).setUp(path)
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.quiz.quizDuration = 30
+        self.quiz.save()
+
+        self.quizAttempt = QuizAttempt.objects.create(
+            quiz=self.quiz,
+            user=self.user,
+            status=QuizAttempt.Status.IN_PROGRESS
+        )
+        self.essayResponse = Response.objects.create(
+            question=bakerOperations.createEssayQuestion(self.quiz),
+            quizAttempt=self.quizAttempt
+        )
+        self.trueOrFalseResponse = Response.objects.create(
+            question=bakerOperations.createTrueOrFalseQuestion(self.quiz),
+            quizAttempt=self.quizAttempt
+        )
+
+    def tearDown(self) -> None:
+        cache.delete(getSnapshotCacheKey(self.quizAttempt.url))
+        super(QuizAttemptResponseAutosaveApiVersion1Test, self).tearDown()
+
+    def autosave(self, data):
+        return self.client.post(self.path, json.dumps(data), content_type='application/json')
+
+    def testWhenResponsesChangeThenSaveThemInOneBatch(self):
+        with patch.object(Response.objects, 'bulk_update', wraps=Response.objects.bulk_update) as mockBulkUpdate:
+            response = self.autosave({
+                'url': self.quizAttempt.url,
+                'responses': {
+                    self.essayResponse.url: 'essay answer',
+                    self.trueOrFalseResponse.url: Question.TrueOrFalse.FALSE,
+                }
+            })
+        apiResponse = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(apiResponse['success'])
+        self.assertEqual(apiResponse['saved'], 2)
+        mockBulkUpdate.assert_called_once()
+
+        self.essayResponse.refresh_from_db()
+        self.trueOrFalseResponse.refresh_from_db()
+        self.assertEqual(self.essayResponse.answer, 'essay answer')
+        self.assertEqual(self.trueOrFalseResponse.trueOrFalse, Question.TrueOrFalse.FALSE)
+
+    def testWhenNothingChangedThenNothingIsSaved(self):
+        self.autosave({'url': self.quizAttempt.url, 'responses': {self.essayResponse.url: 'essay answer'}})
+        response = self.autosave({'url': self.quizAttempt.url, 'responses': {self.essayResponse.url: 'essay answer'}})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['saved'], 0)
+
+    def testWhenAttemptBelongsToAnotherUserThenReturnNotFound(self):
+        self.quizAttempt.user = bakerOperations.createUser()
+        self.quizAttempt.save()
+
+        response = self.autosave({'url': self.quizAttempt.url, 'responses': {self.essayResponse.url: 'answer'}})
+        self.assertEqual(response.status_code, 404)
+
+    @patch.object(QuizAttempt, 'hasQuizEnded', return_value=True)
+    def testWhenQuizHasEndedThenReturnBadRequest(self, mockHasQuizEnded):
+        response = self.autosave({'url': self.quizAttempt.url, 'responses': {self.essayResponse.url: 'answer'}})
+        self.essayResponse.refresh_from_db()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.essayResponse.answer)
+
+    def testWhenResponseUrlIsUnknownThenReturnBadRequest(self):
+        response = self.autosave({'url': self.quizAttempt.url, 'responses': {'non-existing-url': 'answer'}})
+        self.assertEqual(response.status_code, 400)
+
+    def testWhenBodyIsNotAnObjectThenReturnBadRequest(self):
+        for data in [[self.quizAttempt.url], self.quizAttempt.url, 1]:
+            response = self.autosave(data)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['message'], 'Invalid responses.')
+
+    def testWhenAnswerIsInvalidThenNoResponseIsSaved(self):
+        response = self.autosave({
+            'url': self.quizAttempt.url,
+            'responses': {
+                self.essayResponse.url: 'essay answer',
+                self.trueOrFalseResponse.url: 'MAYBE',
+            }
+        })
+        self.essayResponse.refresh_from_db()
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.essayResponse.answer)
+
+    def testWhenMultipleChoiceAnswerIsNotAListThenReturnBadRequest(self):
+        multipleChoiceResponse = Response.objects.create(
+            question=bakerOperations.createMultipleChoiceQuestionAndAnswers(self.quiz),
+            quizAttempt=self.quizAttempt
+        )
+
+        for answer in ['choice-id', {'id': 'choice-id'}, [{'id': 'choice-id'}]]:
+            response = self.autosave({'url': self.quizAttempt.url, 'responses': {multipleChoiceResponse.url: answer}})
+            self.assertEqual(response.status_code, 400)
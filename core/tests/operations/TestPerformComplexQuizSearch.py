@@ -0,0 +1,50 @@
+from unittest import skipIf, skipUnless
+
+from django.db import connection
+
+from core.models import Quiz
+from onequiz.operations import bakerOperations
+from onequiz.operations.generalOperations import performComplexQuizSearch
+from onequiz.tests.BaseTest import BaseTest
+
+
+class PerformComplexQuizSearchTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(PerformComplexQuizSearchTest, self).setUp('')
+        self.namedQuiz = bakerOperations.createQuiz(self.user, save=False)
+        self.namedQuiz.name = 'Photosynthesis in plants'
+        self.describedQuiz = bakerOperations.createQuiz(self.user, save=False)
+        self.describedQuiz.description = 'Covers light reactions and photosynthesis.'
+        self.otherQuiz = bakerOperations.createQuiz(self.user, save=False)
+        self.otherQuiz.name = 'Roman history'
+        Quiz.objects.bulk_create([self.namedQuiz, self.describedQuiz, self.otherQuiz])
+
+    def testEmptyQueryReturnsEveryQuiz(self):
+        self.assertEqual(performComplexQuizSearch('  ').count(), 3)
+
+    def testSearchByExactUrl(self):
+        self.assertEqual(list(performComplexQuizSearch(self.otherQuiz.url)), [self.otherQuiz])
+
+    def testSearchByPartialUrl(self):
+        self.assertIn(self.otherQuiz, performComplexQuizSearch(self.otherQuiz.url[2:-2]))
+
+    @skipIf(connection.vendor == 'postgresql', 'PostgreSQL searches the full-text document instead')
+    def testFallbackMatchesSubstring(self):
+        self.assertCountEqual(
+            performComplexQuizSearch('hotosynth'),
+            [self.namedQuiz, self.describedQuiz],
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL')
+    def testFullTextRanksNameAboveDescription(self):
+        self.assertEqual(
+            list(performComplexQuizSearch('photosynth')),
+            [self.namedQuiz, self.describedQuiz],
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL')
+    def testFullTextFollowsNameChanges(self):
+        self.otherQuiz.name = 'Photosynthesis revision'
+        self.otherQuiz.save(update_fields=['name'])
+        self.assertIn(self.otherQuiz, performComplexQuizSearch('photosynthesis'))
@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+
+from core.models import Question
+from onequiz.operations import answerKeyOperations, bakerOperations
+from onequiz.operations.answerKeyOperations import QuizAnswerKey, compiledAnswerKeys, getAnswerKeyCacheKey
+from onequiz.tests.BaseTest import BaseTest
+
+
+class QuizAnswerKeyTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(QuizAnswerKeyTest, self).setUp('')
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.question = bakerOperations.createTrueOrFalseQuestion(self.quiz)
+
+    def tearDown(self) -> None:
+        QuizAnswerKey.invalidate(self.quiz.id)
+        super(QuizAnswerKeyTest, self).tearDown()
+
+    def testLoadIsMemoizedUntilQuestionsChange(self):
+        answerKey = QuizAnswerKey.load(self.quiz.id)
+        self.assertEqual(answerKey.trueOrFalseAnswers, [self.question.trueOrFalse])
+
+        with self.assertNumQueries(1):
+            self.assertIs(QuizAnswerKey.load(self.quiz.id), answerKey)
+
+        self.question.trueOrFalse = Question.TrueOrFalse.TRUE
+        self.question.versionNo += 1
+        self.question.save()
+
+        self.assertEqual(QuizAnswerKey.load(self.quiz.id).trueOrFalseAnswers, [Question.TrueOrFalse.TRUE])
+
+    def testLoadFallsBackToCacheAcrossProcesses(self):
+        QuizAnswerKey.load(self.quiz.id)
+        compiledAnswerKeys.clear()
+
+        with self.assertNumQueries(1):
+            answerKey = QuizAnswerKey.load(self.quiz.id)
+        self.assertEqual(answerKey.questionIds, [self.question.id])
+
+    def testInvalidateRemovesCompiledKey(self):
+        QuizAnswerKey.load(self.quiz.id)
+        QuizAnswerKey.invalidate(self.quiz.id)
+
+        self.assertNotIn(self.quiz.id, compiledAnswerKeys)
+        self.assertIsNone(cache.get(getAnswerKeyCacheKey(self.quiz.id)))
+
+    @patch.object(answerKeyOperations, 'COMPILED_ANSWER_KEYS_MAX_SIZE', 2)
+    def testLeastRecentlyUsedKeyIsEvicted(self):
+        otherQuizzes = [bakerOperations.createQuiz(self.user) for _ in range(2)]
+        for quiz in otherQuizzes:
+            self.addCleanup(QuizAnswerKey.invalidate, quiz.id)
+        compiledAnswerKeys.clear()
+
+        QuizAnswerKey.load(self.quiz.id)
+        QuizAnswerKey.load(otherQuizzes[0].id)
+        QuizAnswerKey.load(self.quiz.id)
+        QuizAnswerKey.load(otherQuizzes[1].id)
+
+        self.assertEqual(list(compiledAnswerKeys), [self.quiz.id, otherQuizzes[1].id])
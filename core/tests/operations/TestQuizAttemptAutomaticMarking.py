@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from core.models import QuizAttempt, Response, Question, Result
+from onequiz.operations import bakerOperations
+from onequiz.operations.generalOperations import QuizAttemptAutomaticMarking
+from onequiz.tests.BaseTest import BaseTest
+
+
+class QuizAttemptAutomaticMarkingTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(QuizAttemptAutomaticMarkingTest, self).setUp('')
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.quizAttempt = QuizAttempt.objects.create(
+            quiz=self.quiz,
+            user=self.user,
+            status=QuizAttempt.Status.IN_REVIEW
+        )
+
+    def createMultipleChoiceQuestion(self, choiceType, correctChoices, mark=10):
+        return Question.objects.create(
+            quiz=self.quiz,
+            content='content',
+            mark=mark,
+            questionType=Question.Type.MULTIPLE_CHOICE,
+            choiceType=choiceType,
+            choices=[
+                {'id': choiceId, 'content': f'choice {choiceId}', 'isChecked': choiceId in correctChoices}
+                for choiceId in ['a', 'b', 'c', 'd']
+            ]
+        )
+
+    def mark(self):
+        responses = self.quizAttempt.responses.select_related('question').all()
+        marked = QuizAttemptAutomaticMarking(self.quizAttempt, responses).mark()
+        return marked, Result.objects.filter(quizAttempt=self.quizAttempt).first()
+
+    def testSingleChoiceQuestionIsMarkedAgainstSelectedChoiceIds(self):
+        correctQuestion = self.createMultipleChoiceQuestion(Question.ChoiceType.SINGLE, ['b'])
+        wrongQuestion = self.createMultipleChoiceQuestion(Question.ChoiceType.SINGLE, ['c'])
+        Response.objects.create(question=correctQuestion, quizAttempt=self.quizAttempt, selectedChoices=['b'])
+        Response.objects.create(question=wrongQuestion, quizAttempt=self.quizAttempt, selectedChoices=['a'])
+
+        marked, result = self.mark()
+
+        self.assertTrue(marked)
+        self.assertEqual(result.numberOfCorrectAnswers, 1)
+        self.assertEqual(result.numberOfWrongAnswers, 1)
+        self.assertEqual(result.score, Decimal('50.00'))
+
+    def testMultipleChoiceQuestionAwardsMarksPerMatchingChoice(self):
+        question = self.createMultipleChoiceQuestion(Question.ChoiceType.MULTIPLE, ['a', 'b'], mark=8)
+        response = Response.objects.create(question=question, quizAttempt=self.quizAttempt, selectedChoices=['a', 'c'])
+
+        marked, result = self.mark()
+        response.refresh_from_db()
+
+        self.assertTrue(marked)
+        self.assertEqual(result.numberOfPartialAnswers, 1)
+        self.assertEqual(response.mark, Decimal('4.00'))
+        self.assertEqual(result.score, Decimal('50.00'))
+
+    def testTrueOrFalseQuestion(self):
+        question = bakerOperations.createTrueOrFalseQuestion(self.quiz)
+        Response.objects.create(question=question, quizAttempt=self.quizAttempt, trueOrFalse=question.trueOrFalse)
+
+        marked, result = self.mark()
+
+        self.assertTrue(marked)
+        self.assertEqual(result.numberOfCorrectAnswers, 1)
+
+    def testQuizWithEssayQuestionIsNotMarked(self):
+        Response.objects.create(question=bakerOperations.createEssayQuestion(self.quiz), quizAttempt=self.quizAttempt)
+
+        marked, result = self.mark()
+
+        self.assertFalse(marked)
+        self.assertIsNone(result)
+
+    def testAttemptIsOnlyMarkedOnce(self):
+        question = bakerOperations.createTrueOrFalseQuestion(self.quiz)
+        Response.objects.create(question=question, quizAttempt=self.quizAttempt, trueOrFalse=question.trueOrFalse)
+
+        self.assertTrue(self.mark()[0])
+        self.quizAttempt.status = QuizAttempt.Status.IN_REVIEW
+        self.assertFalse(self.mark()[0])
+
+        self.assertEqual(Result.objects.filter(quizAttempt=self.quizAttempt).count(), 1)
+        self.quizAttempt.refresh_from_db()
+        self.assertEqual(self.quizAttempt.status, QuizAttempt.Status.MARKED)
@@ -0,0 +1,135 @@
+import random
+
+from core.models import QuizAttempt, Response, Question, Result
+from onequiz.operations import bakerOperations
+from onequiz.operations.generalOperations import QuizAttemptAutomaticMarking, QuizAttemptBatchAutomaticMarking
+from onequiz.tests.BaseTest import BaseTest
+
+
+class QuizAttemptBatchAutomaticMarkingTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(QuizAttemptBatchAutomaticMarkingTest, self).setUp('')
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.random = random.Random(7)
+
+    def createMultipleChoiceQuestion(self, choiceType, numberOfChoices, mark):
+        choiceIds = [f'choice-{index}' for index in range(numberOfChoices)]
+        correctChoiceIds = self.random.sample(choiceIds, 1 if choiceType == Question.ChoiceType.SINGLE else 2)
+        return Question.objects.create(
+            quiz=self.quiz,
+            content='content',
+            mark=mark,
+            questionType=Question.Type.MULTIPLE_CHOICE,
+            choiceType=choiceType,
+            choices=[
+                {'id': choiceId, 'content': choiceId, 'isChecked': choiceId in correctChoiceIds}
+                for choiceId in choiceIds
+            ]
+        )
+
+    def createAttempt(self, questions):
+        quizAttempt = QuizAttempt.objects.create(quiz=self.quiz, user=self.user, status=QuizAttempt.Status.IN_REVIEW)
+        responses = []
+        for question in questions:
+            response = Response(question=question, quizAttempt=quizAttempt)
+            if question.questionType == Question.Type.TRUE_OR_FALSE:
+                response.trueOrFalse = self.random.choice(Question.TrueOrFalse.values)
+            else:
+                choiceIds = question.getChoiceIds()
+                response.selectedChoices = self.random.sample(choiceIds, self.random.randint(0, len(choiceIds)))
+            responses.append(response)
+        Response.objects.bulk_create(responses)
+        return quizAttempt
+
+    def markOneByOne(self, quizAttempts):
+        for quizAttempt in quizAttempts:
+            responses = quizAttempt.responses.select_related('question').order_by('question_id')
+            QuizAttemptAutomaticMarking(quizAttempt, responses).mark()
+        return self.collectResults()
+
+    def collectResults(self):
+        results = {
+            result.quizAttempt_id: (
+                result.numberOfCorrectAnswers, result.numberOfPartialAnswers, result.numberOfWrongAnswers, result.score
+            )
+            for result in Result.objects.all()
+        }
+        marks = dict(Response.objects.values_list('id', 'mark'))
+        Result.objects.all().delete()
+        Response.objects.update(mark=None)
+        QuizAttempt.objects.update(status=QuizAttempt.Status.IN_REVIEW)
+        return results, marks
+
+    def testBatchMarkingMatchesSingleAttemptMarking(self):
+        questions = [
+            self.createMultipleChoiceQuestion(Question.ChoiceType.MULTIPLE, 3, 10),
+            self.createMultipleChoiceQuestion(Question.ChoiceType.MULTIPLE, 6, 7),
+            self.createMultipleChoiceQuestion(Question.ChoiceType.MULTIPLE, 4, 1),
+            self.createMultipleChoiceQuestion(Question.ChoiceType.SINGLE, 4, 5),
+            bakerOperations.createTrueOrFalseQuestion(self.quiz),
+        ]
+        quizAttempts = [self.createAttempt(questions) for _ in range(30)]
+
+        expectedResults, expectedMarks = self.markOneByOne(quizAttempts)
+        with self.assertNumQueries(8):
+            markedAttempts = QuizAttemptBatchAutomaticMarking(self.quiz, quizAttempts).mark()
+        actualResults, actualMarks = self.collectResults()
+
+        self.assertEqual(len(markedAttempts), len(quizAttempts))
+        self.assertEqual(actualResults, expectedResults)
+        self.assertEqual(actualMarks, expectedMarks)
+
+    def testQuestionsWithoutCorrectChoicesAreMarkedAlike(self):
+        uncheckedChoices = [
+            {'id': f'choice-{index}', 'content': 'content', 'isChecked': False} for index in range(3)
+        ]
+        questions = [
+            Question.objects.create(
+                quiz=self.quiz,
+                content='content',
+                mark=4,
+                questionType=Question.Type.MULTIPLE_CHOICE,
+                choiceType=choiceType,
+                choices=choices
+            )
+            for choiceType, choices in [
+                (Question.ChoiceType.MULTIPLE, []),
+                (Question.ChoiceType.MULTIPLE, uncheckedChoices),
+                (Question.ChoiceType.SINGLE, []),
+                (Question.ChoiceType.SINGLE, uncheckedChoices),
+            ]
+        ]
+        quizAttempts = [self.createAttempt(questions) for _ in range(10)]
+
+        expectedResults, expectedMarks = self.markOneByOne(quizAttempts)
+        QuizAttemptBatchAutomaticMarking(self.quiz, quizAttempts).mark()
+        actualResults, actualMarks = self.collectResults()
+
+        self.assertEqual(len(expectedResults), len(quizAttempts))
+        self.assertEqual(actualResults, expectedResults)
+        self.assertEqual(actualMarks, expectedMarks)
+
+    def testAttemptWithEssayResponseIsNotMarked(self):
+        essayAttempt = QuizAttempt.objects.create(quiz=self.quiz, user=self.user, status=QuizAttempt.Status.IN_REVIEW)
+        Response.objects.create(question=bakerOperations.createEssayQuestion(self.quiz), quizAttempt=essayAttempt)
+        quizAttempt = self.createAttempt([bakerOperations.createTrueOrFalseQuestion(self.quiz)])
+
+        markedAttempts = QuizAttemptBatchAutomaticMarking(self.quiz, [essayAttempt, quizAttempt]).mark()
+
+        self.assertEqual(markedAttempts, [quizAttempt])
+        self.assertFalse(Result.objects.filter(quizAttempt=essayAttempt).exists())
+
+    def testAttemptsAreOnlyMarkedOnce(self):
+        questions = [bakerOperations.createTrueOrFalseQuestion(self.quiz)]
+        markedAttempt = self.createAttempt(questions)
+        QuizAttemptAutomaticMarking(markedAttempt, markedAttempt.responses.all()).mark()
+        quizAttempt = self.createAttempt(questions)
+
+        markedAttempts = QuizAttemptBatchAutomaticMarking(self.quiz, [markedAttempt, quizAttempt]).mark()
+        self.assertEqual(markedAttempts, [quizAttempt])
+        self.assertEqual(QuizAttemptBatchAutomaticMarking(self.quiz, [markedAttempt, quizAttempt]).mark(), [])
+
+        self.assertEqual(Result.objects.filter(quizAttempt__in=[markedAttempt, quizAttempt]).count(), 2)
+        quizAttempt.refresh_from_db()
+        self.assertEqual(quizAttempt.status, QuizAttempt.Status.MARKED)
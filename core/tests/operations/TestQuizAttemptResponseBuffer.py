@@ -0,0 +1,83 @@
+from unittest.mock import patch
+
+import fakeredis
+from django.test import override_settings
+
+from core.models import QuizAttempt, Response, Question
+from onequiz.operations import bakerOperations, bufferOperations, redisOperations
+from onequiz.tests.BaseTest import BaseTest
+
+
+@override_settings(QUIZ_ATTEMPT_WRITE_BEHIND=True)
+class QuizAttemptResponseBufferTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(QuizAttemptResponseBufferTest, self).setUp('')
+        self.redisClient = fakeredis.FakeRedis(decode_responses=True)
+        redisClientPatcher = patch.object(redisOperations, 'redisClient', self.redisClient)
+        redisClientPatcher.start()
+        self.addCleanup(redisClientPatcher.stop)
+
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.quizAttempt = QuizAttempt.objects.create(
+            quiz=self.quiz,
+            user=self.user,
+            status=QuizAttempt.Status.IN_PROGRESS
+        )
+        self.essayResponse = Response.objects.create(
+            question=bakerOperations.createEssayQuestion(self.quiz),
+            quizAttempt=self.quizAttempt
+        )
+        self.trueOrFalseResponse = Response.objects.create(
+            question=bakerOperations.createTrueOrFalseQuestion(self.quiz),
+            quizAttempt=self.quizAttempt
+        )
+
+    def testFlushWritesBufferedAnswers(self):
+        bufferOperations.bufferAnswers(self.quizAttempt.url, {
+            self.essayResponse.url: 'essay answer',
+            self.trueOrFalseResponse.url: Question.TrueOrFalse.TRUE,
+        })
+        self.assertIsNone(Response.objects.get(id=self.essayResponse.id).answer)
+        self.assertEqual(
+            bufferOperations.getBufferedAnswers(self.quizAttempt.url)[self.essayResponse.url], 'essay answer'
+        )
+
+        self.assertEqual(bufferOperations.flushAnswers(self.quizAttempt.url), 2)
+
+        self.assertEqual(Response.objects.get(id=self.essayResponse.id).answer, 'essay answer')
+        self.assertEqual(Response.objects.get(id=self.trueOrFalseResponse.id).trueOrFalse, Question.TrueOrFalse.TRUE)
+        self.assertEqual(bufferOperations.getBufferedAnswers(self.quizAttempt.url), {})
+        self.assertFalse(self.redisClient.sismember(bufferOperations.BUFFERED_ATTEMPTS_KEY, self.quizAttempt.url))
+
+    def testFlushDropsInvalidAnswersAndKeepsTheRest(self):
+        multipleChoiceResponse = Response.objects.create(
+            question=bakerOperations.createMultipleChoiceQuestionAndAnswers(self.quiz),
+            quizAttempt=self.quizAttempt
+        )
+        bufferOperations.bufferAnswers(self.quizAttempt.url, {
+            self.essayResponse.url: 'essay answer',
+            self.trueOrFalseResponse.url: 'MAYBE',
+            multipleChoiceResponse.url: ['removed-choice-id'],
+        })
+
+        with self.assertLogs(bufferOperations.logger, 'WARNING') as logs:
+            self.assertEqual(bufferOperations.flushAnswers(self.quizAttempt.url), 1)
+        self.assertEqual(len(logs.output), 2)
+
+        self.assertEqual(Response.objects.get(id=self.essayResponse.id).answer, 'essay answer')
+        self.assertIsNone(Response.objects.get(id=self.trueOrFalseResponse.id).trueOrFalse)
+        self.assertEqual(Response.objects.get(id=multipleChoiceResponse.id).selectedChoices, [])
+        self.assertFalse(self.redisClient.exists(bufferOperations.getFlushingKey(self.quizAttempt.url)))
+        self.assertEqual(bufferOperations.flushAnswers(self.quizAttempt.url, wait=True), 0)
+
+    def testFlushWritesAnswersLeftBehindByCrashedFlush(self):
+        self.redisClient.hset(
+            bufferOperations.getFlushingKey(self.quizAttempt.url), self.essayResponse.url, '"older answer"'
+        )
+        bufferOperations.bufferAnswers(self.quizAttempt.url, {self.essayResponse.url: 'newer answer'})
+
+        bufferedAnswers = bufferOperations.getBufferedAnswers(self.quizAttempt.url)
+        self.assertEqual(bufferedAnswers[self.essayResponse.url], 'newer answer')
+        self.assertEqual(bufferOperations.flushAllAnswers(), 2)
+        self.assertEqual(Response.objects.get(id=self.essayResponse.id).answer, 'newer answer')
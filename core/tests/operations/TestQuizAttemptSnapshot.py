@@ -0,0 +1,117 @@
+import pickle
+
+from django.core.cache import cache
+
+from core.models import QuizAttempt, Response, Question
+from onequiz.operations import bakerOperations
+from onequiz.operations.snapshotOperations import QuizAttemptSnapshot, getSnapshotCacheKey
+from onequiz.tests.BaseTest import BaseTest
+
+
+class QuizAttemptSnapshotTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(QuizAttemptSnapshotTest, self).setUp('')
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.quiz.quizDuration = 30
+        self.quiz.save()
+
+        self.essayQuestion = bakerOperations.createEssayQuestion(self.quiz)
+        self.trueOrFalseQuestion = bakerOperations.createTrueOrFalseQuestion(self.quiz)
+
+        self.quizAttempt = QuizAttempt.objects.create(
+            quiz=self.quiz,
+            user=self.user,
+            status=QuizAttempt.Status.IN_PROGRESS
+        )
+        Response.objects.bulk_create([
+            Response(question=self.essayQuestion, quizAttempt=self.quizAttempt),
+            Response(question=self.trueOrFalseQuestion, quizAttempt=self.quizAttempt),
+        ])
+
+    def tearDown(self) -> None:
+        cache.delete(getSnapshotCacheKey(self.quizAttempt.url))
+        super(QuizAttemptSnapshotTest, self).tearDown()
+
+    def testLoadReturnsNoneForUnknownAttempt(self):
+        self.assertIsNone(QuizAttemptSnapshot.load('non-existing-url'))
+
+    def testLoadIsServedFromCacheAfterFirstBuild(self):
+        snapshot = QuizAttemptSnapshot.load(self.quizAttempt.url)
+        self.assertEqual(len(snapshot.responseUrls), 2)
+
+        with self.assertNumQueries(0):
+            cachedSnapshot = QuizAttemptSnapshot.load(self.quizAttempt.url)
+            self.assertEqual(cachedSnapshot.quizAttempt, self.quizAttempt)
+            self.assertEqual(cachedSnapshot.quizAttempt.quiz.creator_id, self.user.id)
+            self.assertTrue(cachedSnapshot.quizAttempt.hasViewPermission(self.user))
+            for responseUrl in cachedSnapshot.responseUrls:
+                self.assertIsNotNone(cachedSnapshot.getResponse(responseUrl).question.questionType)
+
+    def getTrueOrFalseResponse(self, snapshot):
+        return next(r for r in snapshot.responses.values() if r.question.questionType == Question.Type.TRUE_OR_FALSE)
+
+    def testSetAnswersOnlyWritesChangedAnswers(self):
+        snapshot = QuizAttemptSnapshot.load(self.quizAttempt.url)
+        response = self.getTrueOrFalseResponse(snapshot)
+
+        self.assertEqual(snapshot.setAnswers({response.url: Question.TrueOrFalse.TRUE}), 1)
+        self.assertEqual(snapshot.version, 2)
+        self.assertEqual(Response.objects.get(id=response.id).trueOrFalse, Question.TrueOrFalse.TRUE)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(snapshot.setAnswers({response.url: Question.TrueOrFalse.TRUE}), 0)
+        self.assertEqual(snapshot.version, 2)
+
+        cachedSnapshot = QuizAttemptSnapshot.load(self.quizAttempt.url)
+        self.assertEqual(cachedSnapshot.version, 2)
+        self.assertEqual(cachedSnapshot.getResponse(response.url).trueOrFalse, Question.TrueOrFalse.TRUE)
+
+    def testSetAnswersComparesAgainstLatestSavedAnswers(self):
+        firstTab = QuizAttemptSnapshot.load(self.quizAttempt.url)
+        secondTab = QuizAttemptSnapshot.load(self.quizAttempt.url)
+        responseUrl = self.getTrueOrFalseResponse(firstTab).url
+        essayUrl = next(url for url in firstTab.responseUrls if url != responseUrl)
+
+        firstTab.setAnswers({responseUrl: Question.TrueOrFalse.TRUE})
+        # The second tab never saw TRUE, but clearing the answer must still reach the database
+        self.assertEqual(secondTab.setAnswers({responseUrl: None}), 1)
+        self.assertIsNone(Response.objects.get(url=responseUrl).trueOrFalse)
+
+        # Nor may the first tab put its stale TRUE back into the cache
+        firstTab.setAnswers({essayUrl: 'Essay answer'})
+        cachedSnapshot = QuizAttemptSnapshot.load(self.quizAttempt.url)
+        self.assertIsNone(cachedSnapshot.getResponse(responseUrl).trueOrFalse)
+        self.assertEqual(cachedSnapshot.getResponse(essayUrl).answer, 'Essay answer')
+
+    def testUsersAreNotCached(self):
+        QuizAttemptSnapshot.load(self.quizAttempt.url)
+        cachedSnapshot = cache.get(getSnapshotCacheKey(self.quizAttempt.url))
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(cachedSnapshot))
+
+    def testSubmittedAttemptIsNotCached(self):
+        self.quizAttempt.status = QuizAttempt.Status.SUBMITTED
+        self.quizAttempt.save()
+
+        QuizAttemptSnapshot.load(self.quizAttempt.url)
+        self.assertIsNone(cache.get(getSnapshotCacheKey(self.quizAttempt.url)))
+
+    def testInvalidateRemovesSnapshot(self):
+        QuizAttemptSnapshot.load(self.quizAttempt.url)
+        QuizAttemptSnapshot.invalidate(self.quizAttempt.url)
+        self.assertIsNone(cache.get(getSnapshotCacheKey(self.quizAttempt.url)))
+
+    def testResponsesAreOrderedAndAddressedByPosition(self):
+        responses = list(self.quizAttempt.responses.order_by('id'))
+        responses[0].orderNo = 2
+        responses[1].orderNo = 1
+        Response.objects.bulk_update(responses, ['orderNo'])
+
+        snapshot = QuizAttemptSnapshot.load(self.quizAttempt.url)
+
+        self.assertEqual(snapshot.responseUrls, [responses[1].url, responses[0].url])
+        self.assertEqual(snapshot.getPosition(responses[0].url), 1)
+        self.assertEqual(snapshot.getPosition(page='1'), 0)
+        self.assertIsNone(snapshot.getPosition(page='3'))
+        self.assertIsNone(snapshot.getPosition(page='first'))
+        self.assertIsNone(snapshot.getPosition('non-existing-url'))
@@ -0,0 +1,46 @@
+from core.models import QuizAttempt
+from onequiz.operations import bakerOperations
+from onequiz.operations.quizAttemptOperations import submitExpiredQuizAttempts
+from onequiz.tests.BaseTest import BaseTest
+from tasks.models import Task
+
+
+class SubmitExpiredQuizAttemptsTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(SubmitExpiredQuizAttemptsTest, self).setUp('')
+        self.quiz = bakerOperations.createQuiz(self.user)
+
+    def createQuizAttempt(self, enableAutoMarking, status=QuizAttempt.Status.IN_PROGRESS):
+        self.quiz.enableAutoMarking = enableAutoMarking
+        self.quiz.save()
+        return QuizAttempt.objects.create(quiz=self.quiz, user=self.user, status=status)
+
+    def testAutoMarkedAttemptIsPutInReviewAndQueuedForMarking(self):
+        quizAttempt = self.createQuizAttempt(True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(submitExpiredQuizAttempts([quizAttempt.id]), 1)
+
+        quizAttempt.refresh_from_db()
+        self.assertEqual(quizAttempt.status, QuizAttempt.Status.IN_REVIEW)
+        task = Task.objects.get(name='QuizAttemptBatchAutomaticMarkingTask')
+        self.assertEqual(task.data, {'quizId': self.quiz.id, 'urls': [quizAttempt.url]})
+
+    def testManuallyMarkedAttemptIsSubmitted(self):
+        quizAttempt = self.createQuizAttempt(False)
+
+        self.assertEqual(submitExpiredQuizAttempts([quizAttempt.id]), 1)
+
+        quizAttempt.refresh_from_db()
+        self.assertEqual(quizAttempt.status, QuizAttempt.Status.SUBMITTED)
+        self.assertFalse(Task.objects.exists())
+
+    def testAttemptNoLongerBeingEditedIsLeftAlone(self):
+        quizAttempt = self.createQuizAttempt(True, QuizAttempt.Status.MARKED)
+
+        self.assertEqual(submitExpiredQuizAttempts([quizAttempt.id]), 0)
+
+        quizAttempt.refresh_from_db()
+        self.assertEqual(quizAttempt.status, QuizAttempt.Status.MARKED)
+        self.assertFalse(Task.objects.exists())
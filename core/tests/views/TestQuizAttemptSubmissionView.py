@@ -0,0 +1,45 @@
+from django.urls import reverse
+
+from core.models import QuizAttempt
+from onequiz.operations import bakerOperations
+from onequiz.tests.BaseTestViews import BaseTestViews
+from tasks.models import Task
+
+
+class QuizAttemptSubmissionViewTest(BaseTestViews):
+
+    def setUp(self, path=None) -> None:
+        super(QuizAttemptSubmissionViewTest, self).setUp('')
+        self.quiz = bakerOperations.createQuiz(self.user)
+        self.quiz.quizDuration = 60
+        self.quiz.enableAutoMarking = True
+        self.quiz.save()
+        self.quizAttempt = QuizAttempt.objects.create(
+            user=self.user, quiz=self.quiz, status=QuizAttempt.Status.IN_PROGRESS
+        )
+        self.path = reverse('core:quiz-attempt-submission-preview', kwargs={'url': self.quizAttempt.url})
+
+    def submit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.path, {'submitQuiz': ''})
+
+    def testSubmittedAttemptIsQueuedForMarking(self):
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 302)
+        self.quizAttempt.refresh_from_db()
+        self.assertEqual(self.quizAttempt.status, QuizAttempt.Status.IN_REVIEW)
+        self.assertEqual(Task.objects.filter(name='QuizAttemptAutomaticMarkingTask').count(), 1)
+
+    def testSubmittingAMarkedAttemptAgainLeavesItMarked(self):
+        self.submit()
+        # The marker finishes before the second POST of a double click arrives
+        QuizAttempt.objects.filter(id=self.quizAttempt.id).update(status=QuizAttempt.Status.MARKED)
+        Task.objects.update(status=Task.Status.COMPLETED)
+
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 302)
+        self.quizAttempt.refresh_from_db()
+        self.assertEqual(self.quizAttempt.status, QuizAttempt.Status.MARKED)
+        self.assertEqual(Task.objects.filter(name='QuizAttemptAutomaticMarkingTask').count(), 1)
@@ -2,7 +2,8 @@ from django.contrib.auth.decorators import login_required
 from django.urls import path
 
 from core.api import (
-    QuizAttemptCommenceApiVersion1
+    QuizAttemptCommenceApiVersion1,
+    QuizAttemptResponseAutosaveApiVersion1
 )
 from core.views import (
     indexView,
@@ -46,4 +47,9 @@ urlpatterns += [
         QuizAttemptCommenceApiVersion1.as_view(),
         name='quizAttemptCommenceApiVersion1'
     ),
+    path(
+        'api/v1/quizAttemptResponseAutosaveApiVersion1/',
+        QuizAttemptResponseAutosaveApiVersion1.as_view(),
+        name='quizAttemptResponseAutosaveApiVersion1'
+    ),
 ]
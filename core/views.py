@@ -1,11 +1,10 @@
 import operator
-import random
 from functools import reduce
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
 from django.core.paginator import Paginator, PageNotAnInteger, EmptyPage
+from django.db import transaction
 from django.db.models import Q
 from django.http import Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render, redirect
@@ -19,8 +18,9 @@ from core.forms import (
     MultipleChoiceQuestionResponseForm,
 )
 from core.models import Quiz, Question, QuizAttempt, Result, Response
-from onequiz.operations import generalOperations
+from onequiz.operations import bufferOperations, generalOperations, quizAttemptOperations
 from onequiz.operations.generalOperations import QuizAttemptManualMarking
+from onequiz.operations.snapshotOperations import QuizAttemptSnapshot
 from tasks.models import Task
 
 
@@ -248,11 +248,15 @@ def userCreatedQuizzesView(request):
 
 @login_required
 def quizAttemptViewVersion1(request, url):
-    quizAttempt = get_object_or_404(QuizAttempt.objects.select_related('user'), url=url)
+    snapshot = QuizAttemptSnapshot.load(url)
+    if snapshot is None:
+        raise Http404
+
+    quizAttempt = snapshot.quizAttempt
 
     if quizAttempt.hasQuizEnded() and quizAttempt.status in quizAttempt.getEditStatues():
-        quizAttempt.status = QuizAttempt.Status.SUBMITTED
-        quizAttempt.save(update_fields=['status'])
+        quizAttemptOperations.submitExpiredQuizAttempts([quizAttempt.id])
+        quizAttempt.refresh_from_db(fields=['status'])
 
     if not quizAttempt.hasViewPermission(request.user):
         return HttpResponseForbidden('Forbidden')
@@ -261,44 +265,41 @@ def quizAttemptViewVersion1(request, url):
         # Quiz creator wants to mark this quiz. Temporarily redirect to quizAttemptSubmissionPreview and mark there.
         return redirect('core:quiz-attempt-submission-preview', url=url)
 
-    responseUrls = cache.get(f'quiz-attempt-v1-{url}')
-    if responseUrls is None:
-        responseUrls = list(quizAttempt.responses.values_list('url', flat=True))
-        if quizAttempt.quiz.inRandomOrder:
-            random.shuffle(responseUrls)
-        cache.set(
-            f'quiz-attempt-v1-{quizAttempt.url}',
-            responseUrls,
-            quizAttempt.quiz.quizDuration * 60 + 30
-        )
+    responseUrls = snapshot.responseUrls
+    if not responseUrls:
+        return redirect('core:quiz-attempt-submission-preview', url=url)
 
-    responseUrl = request.GET.get('r')
-    if responseUrl not in responseUrls:
-        return redirect(f'/v1/quiz-attempt/{url}/?r={responseUrls[0]}')
+    responseIndex = snapshot.getPosition(request.GET.get('r'), request.GET.get('p'))
+    if responseIndex is None:
+        return redirect(f'/v1/quiz-attempt/{url}/?p=1')
 
-    responseObject = quizAttempt.responses.filter(url=responseUrl).first()
+    responseObject = snapshot.getResponse(responseUrls[responseIndex])
 
     if request.method == 'POST' and 'submitResponse' in request.POST:
         if not quizAttempt.hasQuizEnded():
-            if responseObject.question.questionType == Question.Type.ESSAY:
-                responseObject.answer = request.POST.get('answer')
-            elif responseObject.question.questionType == Question.Type.TRUE_OR_FALSE:
-                responseObject.trueOrFalse = request.POST.get('trueOrFalse')
-            elif responseObject.question.questionType == Question.Type.MULTIPLE_CHOICE:
+            if responseObject.question.questionType == Question.Type.MULTIPLE_CHOICE:
                 optionsKey = next((key for key in request.POST if key.startswith('option')), None)
-                checkedOptionsIds = set(request.POST.getlist(optionsKey))
-                for choice in responseObject.choices:
-                    choice['isChecked'] = choice['id'] in checkedOptionsIds
-            responseObject.save()
+                answer = request.POST.getlist(optionsKey)
+            elif responseObject.question.questionType == Question.Type.TRUE_OR_FALSE:
+                answer = request.POST.get('trueOrFalse')
+            else:
+                answer = request.POST.get('answer')
+            try:
+                snapshot.setAnswers({responseObject.url: answer})
+            except ValueError:
+                messages.error(
+                    request,
+                    'Your answer could not be saved, please select one of the given options.'
+                )
+                return redirect(f'/v1/quiz-attempt/{url}/?p={responseIndex + 1}')
 
-        responseIndex = responseUrls.index(responseUrl)
         if request.POST.get('submitResponse') == 'next':
             isLastElement = responseIndex == len(responseUrls) - 1
             if isLastElement:
                 return redirect('core:quiz-attempt-submission-preview', url=url)
-            return redirect(f'/v1/quiz-attempt/{url}/?r={responseUrls[responseIndex + 1]}')
+            return redirect(f'/v1/quiz-attempt/{url}/?p={responseIndex + 2}')
         elif request.POST.get('submitResponse') == 'previous' and responseIndex != 0:
-            return redirect(f'/v1/quiz-attempt/{url}/?r={responseUrls[responseIndex - 1]}')
+            return redirect(f'/v1/quiz-attempt/{url}/?p={responseIndex}')
         else:
             raise Exception('Invalid POST action')
 
@@ -317,11 +318,11 @@ def quizAttemptViewVersion1(request, url):
         'quizAttempt': quizAttempt,
         'responseUrls': responseUrls,
         'form': form,
-        'has_previous': responseUrls.index(responseUrl) != 0,
+        'has_previous': responseIndex != 0,
         'progress': {
-            'current': responseUrls.index(responseUrl) + 1,
+            'current': responseIndex + 1,
             'total': len(responseUrls),
-            'percentage': round(((responseUrls.index(responseUrl) + 1) / len(responseUrls)) * 100, 0)
+            'percentage': round(((responseIndex + 1) / len(responseUrls)) * 100, 0)
         }
     }
     return render(request, 'core/quizAttemptViewVersion1.html', context)
@@ -331,9 +332,13 @@ def quizAttemptViewVersion1(request, url):
 def quizAttemptSubmissionPreview(request, url):
     quizAttempt = get_object_or_404(QuizAttempt.objects.select_related('quiz', 'user'), url=url)
 
+    # Buffered answers must reach the database before they are reviewed, submitted or marked.
+    if bufferOperations.isWriteBehindEnabled():
+        bufferOperations.flushAnswers(url, wait=True)
+
     if quizAttempt.hasQuizEnded() and quizAttempt.status in quizAttempt.getEditStatues():
-        quizAttempt.status = QuizAttempt.Status.SUBMITTED
-        quizAttempt.save(update_fields=['status'])
+        quizAttemptOperations.submitExpiredQuizAttempts([quizAttempt.id])
+        quizAttempt.refresh_from_db(fields=['status'])
 
     if not quizAttempt.hasViewPermission(request.user):
         return HttpResponseForbidden('Forbidden')
@@ -342,28 +347,40 @@ def quizAttemptSubmissionPreview(request, url):
     # - > User views all their response.
     # - > User submits their quiz attempt.
     if isQuizParticipant and request.method == 'POST' and 'submitQuiz' in request.POST:
-        quizAttempt.status = QuizAttempt.Status.SUBMITTED
-        cache.delete(f'quiz-attempt-v1-{url}')
-
-        if quizAttempt.quiz.enableAutoMarking:
-            Task.objects.create(name='QuizAttemptAutomaticMarkingTask', data={'url': quizAttempt.url})
+        isAutoMarked = quizAttempt.quiz.enableAutoMarking
+        status = QuizAttempt.Status.IN_REVIEW if isAutoMarked else QuizAttempt.Status.SUBMITTED
+
+        with transaction.atomic():
+            # Only an attempt still being edited is submitted, so a repeated POST cannot undo its marking
+            isSubmitted = QuizAttempt.objects.filter(
+                id=quizAttempt.id, status__in=quizAttempt.getEditStatues()
+            ).update(status=status)
+            if isSubmitted:
+                # Dropped once the new status is committed, so a page load in between cannot cache the old one again
+                transaction.on_commit(lambda: QuizAttemptSnapshot.invalidate(url))
+            if isSubmitted and isAutoMarked:
+                # Queued only once the IN_REVIEW status is committed, so the marker never sees the old status
+                Task.objects.enqueueOnCommit(
+                    name='QuizAttemptAutomaticMarkingTask',
+                    data={'url': quizAttempt.url},
+                    dedupKey=quizAttempt.url,
+                )
+
+        if isSubmitted and isAutoMarked:
             messages.success(
                 request,
                 'Your quiz attempt is currently being marked.'
             )
-            quizAttempt.status = QuizAttempt.Status.IN_REVIEW
-        else:
+        elif isSubmitted:
             messages.success(
                 request,
                 'Your quiz attempt will be marked manually by the author.'
             )
-
-        quizAttempt.save(update_fields=['status'])
         return redirect('core:quiz-attempt-submission-preview', url=url)
 
     responseForms = []
     responseBorders = []
-    responses = quizAttempt.responses.select_related('question').all()
+    responses = quizAttempt.responses.select_related('question').order_by('orderNo')
     for response in responses:
         isQuizCreator = quizAttempt.quiz.creator == request.user
         confirmMark = request.method == 'POST' and 'submitQuiz' in request.POST and isQuizCreator
@@ -0,0 +1,142 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from core.models import Question
+
+ANSWER_KEY_FORMAT_VERSION = 2
+ANSWER_KEY_TIMEOUT = 60 * 60 * 24
+COMPILED_ANSWER_KEYS_MAX_SIZE = 256
+
+# quiz id -> compiled answer key, only trusted while its signature still matches the questions in the database. Least
+# recently used keys are evicted first, shared by every thread of the process.
+compiledAnswerKeys = OrderedDict()
+compiledAnswerKeysLock = threading.Lock()
+
+
+def getAnswerKeyCacheKey(quizId):
+    return f'quiz-answer-key-v{ANSWER_KEY_FORMAT_VERSION}-{quizId}'
+
+
+def getQuestionsSignature(quizId):
+    """Changes whenever a question of the quiz is created, updated or deleted."""
+    signature = Question.objects.filter(quiz_id=quizId).aggregate(
+        count=Count('id'),
+        lastId=Max('id'),
+        versions=Sum('versionNo'),
+        lastModified=Max('modifiedDttm'),
+    )
+    lastModified = signature['lastModified'].isoformat() if signature['lastModified'] else None
+    return f"{signature['count']}-{signature['lastId']}-{signature['versions']}-{lastModified}"
+
+
+class QuizAnswerKey:
+    """The compiled marking rules of every question of a quiz, also as arrays for batch marking."""
+    TRUE_OR_FALSE_CODES = {Question.TrueOrFalse.TRUE: 1, Question.TrueOrFalse.FALSE: 0}
+
+    def __init__(self, quizId, signature, questions):
+        """Questions are expected in id order."""
+        self.quizId = quizId
+        self.signature = signature
+        self.questionIds = [question.id for question in questions]
+        self.questionIndex = {question.id: index for index, question in enumerate(questions)}
+
+        self.questionTypes = [question.questionType for question in questions]
+        self.choiceTypes = [question.choiceType for question in questions]
+        self.questionMarks = [question.mark for question in questions]
+        self.trueOrFalseAnswers = [question.trueOrFalse for question in questions]
+        self.choiceIds = [question.getChoiceIds() for question in questions]
+        self.correctChoiceIds = [set(question.getCorrectChoiceIds()) for question in questions]
+        self.compileArrays(questions)
+
+    def compileArrays(self, questions):
+        questionTypes = np.array(self.questionTypes, dtype=object)
+        isMultipleChoice = questionTypes == Question.Type.MULTIPLE_CHOICE
+
+        self.marks = np.array([question.mark or 0 for question in questions], dtype=np.float64)
+        self.isEssay = questionTypes == Question.Type.ESSAY
+        self.isTrueOrFalse = questionTypes == Question.Type.TRUE_OR_FALSE
+        choiceTypes = np.array(self.choiceTypes, dtype=object)
+        self.isSingleChoice = isMultipleChoice & (choiceTypes == Question.ChoiceType.SINGLE)
+        self.isMultipleChoice = isMultipleChoice & ~self.isSingleChoice
+        self.trueOrFalseKey = np.array(
+            [self.TRUE_OR_FALSE_CODES.get(answer, -1) for answer in self.trueOrFalseAnswers], dtype=np.int8
+        )
+
+        # Every choice of every multiple choice question gets a column, flagged when it should be checked. The columns
+        # of a question are contiguous, so per question sums are a reduceat over where each question's columns start.
+        self.choiceSlots = {}
+        choiceKey = []
+        choiceStarts = []
+        choiceQuestions = []
+        self.numberOfChoices = np.zeros(len(questions), dtype=np.int64)
+        for questionIndex, question in enumerate(questions):
+            if not isMultipleChoice[questionIndex] or not question.choices:
+                continue
+            choiceStarts.append(len(choiceKey))
+            choiceQuestions.append(questionIndex)
+            for choice in question.choices:
+                self.choiceSlots[(questionIndex, choice['id'])] = len(choiceKey)
+                choiceKey.append(bool(choice['isChecked']))
+            self.numberOfChoices[questionIndex] = len(question.choices)
+
+        self.choiceKey = np.array(choiceKey, dtype=bool)
+        self.choiceStarts = np.array(choiceStarts, dtype=np.int64)
+        self.choiceQuestions = np.array(choiceQuestions, dtype=np.int64)
+
+        # Partial marks are a running float sum of the rounded mark per choice, so look up the exact same sums
+        # instead of multiplying, which could round differently and change whether an answer counts as correct.
+        maxChoices = int(self.numberOfChoices.max(initial=0))
+        self.partialMarks = np.zeros((len(questions), maxChoices + 1), dtype=np.float64)
+        for questionIndex in np.flatnonzero(self.isMultipleChoice):
+            numberOfChoices = int(self.numberOfChoices[questionIndex])
+            if numberOfChoices == 0:
+                continue
+            marksPerChoice = round((questions[questionIndex].mark or 0) / numberOfChoices, 2)
+            awardedMark = 0
+            for matches in range(1, numberOfChoices + 1):
+                awardedMark += marksPerChoice
+                self.partialMarks[questionIndex, matches] = awardedMark
+
+    def countMatchingChoices(self, selectedChoices):
+        """For a rows x choice slots array of selections, how many choices of each question match the key."""
+        matchingChoices = np.zeros((len(selectedChoices), len(self.questionIds)), dtype=np.int64)
+        if len(self.choiceStarts):
+            matchingChoices[:, self.choiceQuestions] = np.add.reduceat(
+                selectedChoices == self.choiceKey, self.choiceStarts, axis=1, dtype=np.int64
+            )
+        return matchingChoices
+
+    @classmethod
+    def build(cls, quizId, signature=None):
+        signature = signature or getQuestionsSignature(quizId)
+        return cls(quizId, signature, list(Question.objects.filter(quiz_id=quizId).order_by('id')))
+
+    @classmethod
+    def load(cls, quizId):
+        signature = getQuestionsSignature(quizId)
+
+        answerKey = compiledAnswerKeys.get(quizId)
+        if answerKey is None or answerKey.signature != signature:
+            answerKey = cache.get(getAnswerKeyCacheKey(quizId))
+            if answerKey is None or answerKey.signature != signature:
+                answerKey = cls.build(quizId, signature)
+                cache.set(getAnswerKeyCacheKey(quizId), answerKey, ANSWER_KEY_TIMEOUT)
+
+        with compiledAnswerKeysLock:
+            compiledAnswerKeys[quizId] = answerKey
+            compiledAnswerKeys.move_to_end(quizId)
+            while len(compiledAnswerKeys) > COMPILED_ANSWER_KEYS_MAX_SIZE:
+                compiledAnswerKeys.popitem(last=False)
+
+        return answerKey
+
+    @staticmethod
+    def invalidate(quizId):
+        with compiledAnswerKeysLock:
+            compiledAnswerKeys.pop(quizId, None)
+        cache.delete(getAnswerKeyCacheKey(quizId))
+
@@ -0,0 +1,113 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.models import Response
+from onequiz.operations.redisOperations import getRedisClient
+
+logger = logging.getLogger(__name__)
+
+BUFFERED_ATTEMPTS_KEY = 'quiz-attempt-buffers'
+FLUSH_LOCK_TIMEOUT = 60
+
+
+def isWriteBehindEnabled():
+    return settings.QUIZ_ATTEMPT_WRITE_BEHIND
+
+
+def getBufferKey(url):
+    return f'quiz-attempt-buffer-{url}'
+
+
+def getFlushingKey(url):
+    return f'quiz-attempt-buffer-flushing-{url}'
+
+
+def bufferAnswers(quizAttemptUrl, answers):
+    """Store {responseUrl: answer} in the attempt's Redis hash instead of writing the responses."""
+    if not answers:
+        return
+
+    pipeline = getRedisClient().pipeline()
+    pipeline.hset(getBufferKey(quizAttemptUrl), mapping={url: json.dumps(answer) for url, answer in answers.items()})
+    pipeline.sadd(BUFFERED_ATTEMPTS_KEY, quizAttemptUrl)
+    pipeline.execute()
+
+
+def getBufferedAnswers(quizAttemptUrl):
+    """Answers not yet in the database, including any left behind by a flush that did not finish."""
+    client = getRedisClient()
+    answers = client.hgetall(getFlushingKey(quizAttemptUrl))
+    answers.update(client.hgetall(getBufferKey(quizAttemptUrl)))
+    return {url: json.loads(answer) for url, answer in answers.items()}
+
+
+def flushAnswers(quizAttemptUrl, wait=False):
+    """Write the buffered answers of an attempt to the database and return how many responses changed."""
+    lockKey = f'quiz-attempt-buffer-lock-{quizAttemptUrl}'
+    while not cache.add(lockKey, 1, FLUSH_LOCK_TIMEOUT):
+        if not wait:
+            return 0
+        time.sleep(0.1)
+
+    client = getRedisClient()
+    bufferKey = getBufferKey(quizAttemptUrl)
+    flushingKey = getFlushingKey(quizAttemptUrl)
+
+    try:
+        flushed = 0
+        # a flushing hash still present was left by a flush that crashed
+        if client.exists(flushingKey):
+            flushed += writeAnswers(quizAttemptUrl, client.hgetall(flushingKey))
+            client.delete(flushingKey)
+
+        # renamed before reading so answers saved meanwhile land in a fresh hash
+        if client.exists(bufferKey):
+            client.rename(bufferKey, flushingKey)
+            flushed += writeAnswers(quizAttemptUrl, client.hgetall(flushingKey))
+            client.delete(flushingKey)
+
+        client.srem(BUFFERED_ATTEMPTS_KEY, quizAttemptUrl)
+        if client.exists(bufferKey):
+            client.sadd(BUFFERED_ATTEMPTS_KEY, quizAttemptUrl)
+
+        return flushed
+    finally:
+        cache.delete(lockKey)
+
+
+def flushAllAnswers():
+    """Flush every attempt with buffered answers, including buffers orphaned by crashed workers."""
+    client = getRedisClient()
+    quizAttemptUrls = set(client.smembers(BUFFERED_ATTEMPTS_KEY))
+    quizAttemptUrls.update(
+        key.removeprefix(getFlushingKey('')) for key in client.scan_iter(match=getFlushingKey('*'))
+    )
+    return sum(flushAnswers(quizAttemptUrl) for quizAttemptUrl in quizAttemptUrls)
+
+
+def writeAnswers(quizAttemptUrl, answers):
+    responses = Response.objects.select_related('question').filter(
+        quizAttempt__url=quizAttemptUrl,
+        url__in=list(answers)
+    )
+
+    updatedResponses = []
+    updatedFields = set()
+    for response in responses:
+        try:
+            changedFields = response.setAnswer(json.loads(answers[response.url]))
+        except ValueError:
+            # e.g. the choice was removed since, dropped so the rest of the buffer can still be flushed
+            logger.warning('Dropped invalid buffered answer %s of response %s', answers[response.url], response.url)
+            continue
+        if changedFields:
+            updatedResponses.append(response)
+            updatedFields.update(changedFields)
+
+    if updatedResponses:
+        Response.objects.bulk_update(updatedResponses, sorted(updatedFields))
+    return len(updatedResponses)
@@ -1,5 +1,6 @@
 import operator
 import random
+import re
 import uuid
 from functools import reduce
 from string import (
@@ -7,9 +8,14 @@ from string import (
     digits
 )
 
+import numpy as np
 from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
 from django.db.models import (
+    Exists,
     F,
+    OuterRef,
     Case,
     When,
     Value,
@@ -21,10 +27,12 @@ from django.utils import timezone
 
 from core.models import (
     Quiz,
+    QuizAttempt,
     Question,
     Result,
     Response
 )
+from onequiz.operations.answerKeyOperations import QuizAnswerKey
 
 
 def isPasswordStrong(password):
@@ -59,16 +67,45 @@ def performComplexQuizSearch(query, filterList=None):
     ]
 
     filterList.append(reduce(operator.or_, [Q(**{'deleteFl': False})]))
-    if query and query.strip():
-        filterList.append(reduce(operator.or_, [Q(**{f'{v}__icontains': query}) for v in attributesToSearch]))
+    quizList = Quiz.objects.filter(reduce(operator.and_, filterList)).defer('searchVector')
+    if not query or not query.strip():
+        return quizList
 
-    return Quiz.objects.filter(reduce(operator.and_, filterList)).distinct()
+    if connection.vendor == 'postgresql':
+        return performFullTextQuizSearch(quizList, query)
+    return quizList.filter(reduce(operator.or_, [Q(**{f'{v}__icontains': query}) for v in attributesToSearch]))
+
+
+def performFullTextQuizSearch(quizList, query):
+    """Match every word of query as a prefix against the search document, best matches first."""
+    words = re.findall(r'\w+', query)
+    # the url is a random code rather than words, so it keeps its substring match
+    matches = Q(url__icontains=query.strip())
+    if not words:
+        return quizList.filter(matches)
+
+    searchQuery = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=Quiz.SEARCH_CONFIG)
+    return (
+        quizList.filter(matches | Q(searchVector=searchQuery))
+        .annotate(rank=SearchRank(F('searchVector'), searchQuery))
+        .order_by('-rank', '-id')
+    )
+
+
+def getMarkableQuizAttempts(quizAttemptIds):
+    """The attempts of quizAttemptIds still waiting in review for their result."""
+    return QuizAttempt.objects.filter(
+        ~Exists(Result.objects.filter(quizAttempt=OuterRef('pk'))),
+        id__in=quizAttemptIds,
+        status=QuizAttempt.Status.IN_REVIEW,
+    )
 
 
 class QuizAttemptAutomaticMarking:
     def __init__(self, quizAttempt, responses):
         self.quizAttempt = quizAttempt
         self.responses = responses
+        self.answerKey = QuizAnswerKey.load(quizAttempt.quiz_id)
 
     def mark(self):
         numberOfCorrectAnswers = 0
@@ -79,32 +116,37 @@ class QuizAttemptAutomaticMarking:
 
         for response in self.responses:
             awardedMark = 0
-            if response.question.questionType == Question.Type.ESSAY:
+            index = self.answerKey.questionIndex[response.question_id]
+            questionType = self.answerKey.questionTypes[index]
+            questionMark = self.answerKey.questionMarks[index]
+
+            if questionType == Question.Type.ESSAY:
                 return False
 
-            elif response.question.questionType == Question.Type.TRUE_OR_FALSE:
-                actualAnswer = response.question.trueOrFalse
+            elif questionType == Question.Type.TRUE_OR_FALSE:
+                actualAnswer = self.answerKey.trueOrFalseAnswers[index]
                 selectedAnswer = response.trueOrFalse
-                awardedMark = response.question.mark if actualAnswer == selectedAnswer else 0
-                if awardedMark == response.question.mark:
+                awardedMark = questionMark if actualAnswer == selectedAnswer else 0
+                if awardedMark == questionMark:
                     numberOfCorrectAnswers += 1
                 else:
                     numberOfWrongAnswers += 1
 
-            elif response.question.questionType == Question.Type.MULTIPLE_CHOICE:
-                actualChoices = sorted(response.question.choices, key=lambda x: x['id'])
-                selectedChoices = sorted(response.choices, key=lambda x: x['id'])
+            elif questionType == Question.Type.MULTIPLE_CHOICE:
+                correctChoiceIds = self.answerKey.correctChoiceIds[index]
+                selectedChoiceIds = set(response.selectedChoices)
 
-                if response.question.choiceType == Question.ChoiceType.SINGLE:
-                    awardedMark = response.question.mark if actualChoices == selectedChoices else 0
+                if self.answerKey.choiceTypes[index] == Question.ChoiceType.SINGLE:
+                    awardedMark = questionMark if correctChoiceIds == selectedChoiceIds else 0
                 else:
-                    marksPerChoice = round(response.question.mark / len(actualChoices), 2)
-                    for ac in actualChoices:
-                        sc = next((s for s in selectedChoices if s['id'] == ac['id']))
-                        if sc is not None and ac['isChecked'] == sc['isChecked']:
+                    choiceIds = self.answerKey.choiceIds[index]
+                    # a question without choices has nothing to award, as in QuizAttemptBatchAutomaticMarking
+                    marksPerChoice = round(questionMark / len(choiceIds), 2) if choiceIds else 0
+                    for choiceId in choiceIds:
+                        if (choiceId in correctChoiceIds) == (choiceId in selectedChoiceIds):
                             awardedMark += marksPerChoice
 
-                if awardedMark == response.question.mark:
+                if awardedMark == questionMark:
                     numberOfCorrectAnswers += 1
                 elif awardedMark == 0:
                     numberOfWrongAnswers += 1
@@ -112,21 +154,135 @@ class QuizAttemptAutomaticMarking:
                     numberOfPartialAnswers += 1
 
             totalAwardedMark += awardedMark
-            totalQuizMark += response.question.mark
+            totalQuizMark += questionMark
             response.mark = awardedMark
 
-        Result.objects.create(
-            quizAttempt=self.quizAttempt,
-            timeSpent=(timezone.now() - self.quizAttempt.createdDttm).seconds,
-            numberOfCorrectAnswers=numberOfCorrectAnswers,
-            numberOfPartialAnswers=numberOfPartialAnswers,
-            numberOfWrongAnswers=numberOfWrongAnswers,
-            score=round(totalAwardedMark / totalQuizMark * 100, 2)
-        )
-        Response.objects.bulk_update(self.responses, ['mark'])
+        with transaction.atomic():
+            # Only the first marker of an attempt moves it out of review, so marking it again records nothing
+            if not getMarkableQuizAttempts([self.quizAttempt.id]).update(status=QuizAttempt.Status.MARKED):
+                return False
+
+            Result.objects.create(
+                quizAttempt=self.quizAttempt,
+                timeSpent=(timezone.now() - self.quizAttempt.createdDttm).seconds,
+                numberOfCorrectAnswers=numberOfCorrectAnswers,
+                numberOfPartialAnswers=numberOfPartialAnswers,
+                numberOfWrongAnswers=numberOfWrongAnswers,
+                score=round(totalAwardedMark / totalQuizMark * 100, 2)
+            )
+            Response.objects.bulk_update(self.responses, ['mark'])
+
+        self.quizAttempt.status = QuizAttempt.Status.MARKED
         return True
 
 
+class QuizAttemptBatchAutomaticMarking:
+    """Marks many attempts of the same quiz at once against its compiled answer key."""
+
+    def __init__(self, quiz, quizAttempts):
+        self.quiz = quiz
+        self.quizAttempts = list(quizAttempts)
+        self.answerKey = QuizAnswerKey.load(quiz.id)
+
+    def mark(self):
+        """Mark every attempt that can be marked automatically and return those attempts."""
+        answerKey = self.answerKey
+        if not self.quizAttempts or not answerKey.questionIds:
+            return []
+
+        attemptIndex = {quizAttempt.id: index for index, quizAttempt in enumerate(self.quizAttempts)}
+        responses = Response.objects.filter(quizAttempt__in=self.quizAttempts).only(
+            'id', 'quizAttempt_id', 'question_id', 'trueOrFalse', 'selectedChoices', 'mark'
+        )
+
+        numberOfQuestions = len(answerKey.questionIds)
+        shape = (len(self.quizAttempts), numberOfQuestions)
+        hasResponse = np.zeros(shape, dtype=bool)
+        hasUnknownChoice = np.zeros(shape, dtype=bool)
+        trueOrFalseAnswers = np.full(shape, -1, dtype=np.int8)
+        selectedChoices = np.zeros((len(self.quizAttempts), len(answerKey.choiceKey)), dtype=bool)
+        responseCells = []
+
+        for response in responses:
+            row = attemptIndex[response.quizAttempt_id]
+            column = answerKey.questionIndex.get(response.question_id)
+            if column is None:
+                continue
+
+            hasResponse[row, column] = True
+            trueOrFalseAnswers[row, column] = answerKey.TRUE_OR_FALSE_CODES.get(response.trueOrFalse, -1)
+            for choiceId in response.selectedChoices or []:
+                slot = answerKey.choiceSlots.get((column, choiceId))
+                if slot is None:
+                    hasUnknownChoice[row, column] = True
+                else:
+                    selectedChoices[row, slot] = True
+            responseCells.append((response, row, column))
+
+        matchingChoices = answerKey.countMatchingChoices(selectedChoices)
+
+        isTrueOrFalseCorrect = answerKey.isTrueOrFalse & (trueOrFalseAnswers == answerKey.trueOrFalseKey)
+        isSingleChoiceCorrect = (
+            answerKey.isSingleChoice & (matchingChoices == answerKey.numberOfChoices) & ~hasUnknownChoice
+        )
+
+        awardedMarks = np.where(isTrueOrFalseCorrect | isSingleChoiceCorrect, answerKey.marks, 0)
+        awardedMarks = np.where(
+            answerKey.isMultipleChoice,
+            answerKey.partialMarks[np.arange(numberOfQuestions), matchingChoices],
+            awardedMarks
+        )
+        awardedMarks = np.where(hasResponse, awardedMarks, 0)
+
+        isMarked = hasResponse & (answerKey.isTrueOrFalse | answerKey.isSingleChoice | answerKey.isMultipleChoice)
+        isCorrect = isMarked & (awardedMarks == answerKey.marks)
+        isWrong = isMarked & ~isCorrect & (awardedMarks == 0)
+        isPartial = isMarked & ~isCorrect & ~isWrong
+
+        # cumsum adds left to right, matching the per response running totals of QuizAttemptAutomaticMarking.
+        totalAwardedMarks = np.cumsum(awardedMarks, axis=1)[:, -1]
+        totalQuizMarks = np.cumsum(np.where(hasResponse, answerKey.marks, 0), axis=1)[:, -1]
+        canBeMarked = ~(hasResponse & answerKey.isEssay).any(axis=1) & (totalQuizMarks > 0)
+
+        with transaction.atomic():
+            # Attempts marked meanwhile, by another task or an earlier try of this one, are left as they are
+            markableIds = set(
+                getMarkableQuizAttempts(
+                    [quizAttempt.id for row, quizAttempt in enumerate(self.quizAttempts) if canBeMarked[row]]
+                ).select_for_update().values_list('id', flat=True)
+            )
+            markedRows = [
+                row for row, quizAttempt in enumerate(self.quizAttempts) if quizAttempt.id in markableIds
+            ]
+            if not markedRows:
+                return []
+
+            now = timezone.now()
+            Result.objects.bulk_create([
+                Result(
+                    quizAttempt=self.quizAttempts[row],
+                    timeSpent=(now - self.quizAttempts[row].createdDttm).seconds,
+                    numberOfCorrectAnswers=int(isCorrect[row].sum()),
+                    numberOfPartialAnswers=int(isPartial[row].sum()),
+                    numberOfWrongAnswers=int(isWrong[row].sum()),
+                    score=round(totalAwardedMarks[row].item() / totalQuizMarks[row].item() * 100, 2)
+                )
+                for row in markedRows
+            ])
+
+            markedResponses = []
+            for response, row, column in responseCells:
+                if response.quizAttempt_id in markableIds:
+                    response.mark = awardedMarks[row, column].item()
+                    markedResponses.append(response)
+            Response.objects.bulk_update(markedResponses, ['mark'], batch_size=1000)
+            QuizAttempt.objects.filter(id__in=markableIds, status=QuizAttempt.Status.IN_REVIEW).update(
+                status=QuizAttempt.Status.MARKED
+            )
+
+        return [self.quizAttempts[row] for row in markedRows]
+
+
 class QuizAttemptManualMarking:
     def __init__(self, quizAttempt, responses):
         self.quizAttempt = quizAttempt
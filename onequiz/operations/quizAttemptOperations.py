@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from core.models import QuizAttempt
+from onequiz.operations import bufferOperations
+from onequiz.operations.snapshotOperations import QuizAttemptSnapshot
+from tasks.models import Task
+
+EDIT_STATUSES = [QuizAttempt.Status.NOT_ATTEMPTED, QuizAttempt.Status.IN_PROGRESS]
+
+
+def submitExpiredQuizAttempts(quizAttemptIds):
+    """Submit the given attempts that are still being edited, queueing marking for auto marked quizzes."""
+    with transaction.atomic():
+        expiredAttempts = list(
+            QuizAttempt.objects.select_for_update(of=('self',))
+            .filter(id__in=quizAttemptIds, status__in=EDIT_STATUSES)
+            .values_list('id', 'url', 'quiz_id', 'quiz__enableAutoMarking')
+        )
+        if not expiredAttempts:
+            return 0
+
+        urls = [url for _, url, _, _ in expiredAttempts]
+        if bufferOperations.isWriteBehindEnabled():
+            for url in urls:
+                bufferOperations.flushAnswers(url, wait=True)
+
+        urlsByQuiz = defaultdict(list)
+        markingIds = []
+        submittedIds = []
+        for quizAttemptId, url, quizId, enableAutoMarking in expiredAttempts:
+            if enableAutoMarking:
+                urlsByQuiz[quizId].append(url)
+                markingIds.append(quizAttemptId)
+            else:
+                submittedIds.append(quizAttemptId)
+
+        QuizAttempt.objects.filter(id__in=markingIds).update(status=QuizAttempt.Status.IN_REVIEW)
+        QuizAttempt.objects.filter(id__in=submittedIds).update(status=QuizAttempt.Status.SUBMITTED)
+
+        # Attempts of the same quiz expire together at the end of an exam, so they are marked as one batch.
+        Task.objects.enqueueMany(
+            Task.objects.buildTask('QuizAttemptBatchAutomaticMarkingTask', {'quizId': quizId, 'urls': quizUrls})
+            for quizId, quizUrls in urlsByQuiz.items()
+        )
+        # after the commit, so no page view can cache the old status again
+        transaction.on_commit(lambda: QuizAttemptSnapshot.invalidate(*urls))
+
+    return len(expiredAttempts)
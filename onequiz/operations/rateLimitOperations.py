@@ -0,0 +1,35 @@
+from onequiz.operations.redisOperations import getRedisClient
+
+# Refills the bucket for the time since it was last used, then hands out as many of the requested tokens as it holds.
+# Runs as one script so every worker of the fleet draws from the same bucket without races.
+TAKE_TOKENS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updatedAt')
+local tokens = tonumber(bucket[1]) or burst
+local updatedAt = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updatedAt) * rate)
+
+local granted = math.min(requested, math.floor(tokens))
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - granted), 'updatedAt', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return granted
+"""
+
+takeTokensScript = None
+
+
+def getBucketKey(name):
+    return f'rate-limit-bucket-{name}'
+
+
+def takeTokens(name, requested, rate, burst):
+    """Take up to requested tokens from the bucket of name, refilled at rate per second up to burst. Returns how many."""
+    global takeTokensScript
+    if takeTokensScript is None:
+        takeTokensScript = getRedisClient().register_script(TAKE_TOKENS_SCRIPT)
+    return int(takeTokensScript(keys=[getBucketKey(name)], args=[rate, burst, requested]))
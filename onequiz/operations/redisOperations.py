@@ -0,0 +1,12 @@
+import redis
+from django.conf import settings
+
+redisClient = None
+
+
+def getRedisClient():
+    """Raw client for the Redis server behind the default cache, for structures the cache API does not offer."""
+    global redisClient
+    if redisClient is None:
+        redisClient = redis.Redis.from_url(settings.CACHES['default']['LOCATION'], decode_responses=True)
+    return redisClient
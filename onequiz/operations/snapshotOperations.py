@@ -0,0 +1,132 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from core.models import Quiz, QuizAttempt, Response
+from onequiz.operations import bufferOperations
+
+SNAPSHOT_FORMAT_VERSION = 5
+SNAPSHOT_LOCK_TIMEOUT = 10
+
+
+def getSnapshotCacheKey(url):
+    return f'quiz-attempt-snapshot-v{SNAPSHOT_FORMAT_VERSION}-{url}'
+
+
+class QuizAttemptSnapshot:
+    """An attempt with its quiz and responses, loaded once and served from the cache."""
+
+    def __init__(self, quizAttempt, responses, version=1):
+        """Responses are expected in attempt order."""
+        self.quizAttempt = quizAttempt
+        self.responses = {response.url: response for response in responses}
+        self.responseUrls = [response.url for response in responses]
+        self.positions = {responseUrl: position for position, responseUrl in enumerate(self.responseUrls)}
+        self.version = version
+        # tells apart snapshots built separately, which may share a version
+        self.token = uuid.uuid4().hex
+
+    @classmethod
+    def build(cls, url):
+        quizAttempt = QuizAttempt.objects.select_related('quiz').filter(url=url).first()
+        if quizAttempt is None:
+            return None
+
+        responses = list(quizAttempt.responses.select_related('question').all())
+
+        if bufferOperations.isWriteBehindEnabled():
+            bufferedAnswers = bufferOperations.getBufferedAnswers(url)
+            for response in responses:
+                if response.url in bufferedAnswers:
+                    response.setAnswer(bufferedAnswers[response.url])
+
+        # Attempts started before positions were stored all share orderNo 1 and keep their seeded order.
+        responses = sorted(quizAttempt.orderResponses(responses), key=lambda response: response.orderNo or 0)
+        return cls(quizAttempt, responses)
+
+    @classmethod
+    def load(cls, url):
+        snapshot = cache.get(getSnapshotCacheKey(url))
+        if snapshot is None:
+            snapshot = cls.build(url)
+            if snapshot is not None:
+                snapshot.store()
+        return snapshot
+
+    @staticmethod
+    def invalidate(*urls):
+        cache.delete_many([getSnapshotCacheKey(url) for url in urls])
+
+    def store(self):
+        # Only attempts that can still be edited are worth caching, later statuses change through marking.
+        if self.quizAttempt.status not in self.quizAttempt.getEditStatues():
+            return
+
+        # Users carry password hashes, so only their ids go into the cache
+        userFields = [(self.quizAttempt, QuizAttempt.user.field), (self.quizAttempt.quiz, Quiz.creator.field)]
+        for instance, field in userFields:
+            if field.is_cached(instance):
+                field.delete_cached_value(instance)
+
+        secondsLeft = int(self.quizAttempt.getSecondsLeft())
+        if secondsLeft > 0:
+            cache.set(getSnapshotCacheKey(self.quizAttempt.url), self, secondsLeft + 30)
+
+    @contextmanager
+    def lock(self):
+        lockKey = f'quiz-attempt-snapshot-lock-{self.quizAttempt.url}'
+        while not cache.add(lockKey, 1, SNAPSHOT_LOCK_TIMEOUT):
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            cache.delete(lockKey)
+
+    def getResponse(self, url):
+        return self.responses.get(url)
+
+    def getPosition(self, responseUrl=None, page=None):
+        """Zero-based position of a response, addressed either by its url or by its one-based page number."""
+        if page is not None:
+            try:
+                position = int(page) - 1
+            except (TypeError, ValueError):
+                return None
+            return position if 0 <= position < len(self.responseUrls) else None
+        return self.positions.get(responseUrl)
+
+    def setAnswers(self, answers):
+        """Apply {responseUrl: answer}, save the responses that changed and return how many did."""
+        with self.lock():
+            # Compare against the latest saved answers, which another tab or an autosave may have changed since this
+            # snapshot was loaded.
+            current = cache.get(getSnapshotCacheKey(self.quizAttempt.url))
+            if current is None or (current.token, current.version) != (self.token, self.version):
+                current = current or QuizAttemptSnapshot.build(self.quizAttempt.url)
+                if current is None:
+                    return 0
+                vars(self).update(vars(current))
+
+            changedResponses = []
+            changedFields = set()
+            for responseUrl, answer in answers.items():
+                response = self.getResponse(responseUrl)
+                fields = response.setAnswer(answer)
+                if fields:
+                    changedResponses.append(response)
+                    changedFields.update(fields)
+
+            if not changedResponses:
+                return 0
+
+            if bufferOperations.isWriteBehindEnabled():
+                bufferOperations.bufferAnswers(
+                    self.quizAttempt.url, {response.url: response.getAnswer() for response in changedResponses}
+                )
+            else:
+                Response.objects.bulk_update(changedResponses, sorted(changedFields))
+            self.version += 1
+            self.store()
+            return len(changedResponses)
@@ -0,0 +1,79 @@
+import select
+import time
+
+from django.db import connection, transaction
+
+TASK_CHANNEL = 'onequiz_tasks'
+SCHEDULER_LOCK_ID = 731_204_915  # advisory lock held by the worker enqueueing scheduled tasks
+
+
+def isListenSupported():
+    return connection.vendor == 'postgresql'
+
+
+def notifyTaskWorkers():
+    """Wake up workers blocked in TaskListener.wait()."""
+    if not isListenSupported():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_notify(%s, %s)', [TASK_CHANNEL, ''])
+
+
+def tryAdvisoryLock(lockId):
+    """Take a transaction-scoped advisory lock without waiting, always granted without advisory locks."""
+    if connection.vendor != 'postgresql':
+        return True
+
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_xact_lock(%s)', [lockId])
+        return cursor.fetchone()[0]
+
+
+def notifyTaskWorkersOnCommit():
+    """Notify once the enqueuing transaction commits, so woken workers can already see the new tasks."""
+    transaction.on_commit(notifyTaskWorkers)
+
+
+class TaskListener:
+    """Blocks the worker until a task is enqueued or the timeout passes."""
+
+    def __init__(self):
+        self.listenConnection = None
+
+    def connect(self):
+        if self.listenConnection is None or self.listenConnection.closed:
+            self.listenConnection = connection.get_new_connection(connection.get_connection_params())
+            self.listenConnection.autocommit = True
+            with self.listenConnection.cursor() as cursor:
+                cursor.execute(f'LISTEN {TASK_CHANNEL}')
+        return self.listenConnection
+
+    def wait(self, timeout):
+        """Return True when woken up by a notification, False when the timeout passed."""
+        if not isListenSupported():
+            time.sleep(timeout)
+            return False
+
+        try:
+            listenConnection = self.connect()
+            if not select.select([listenConnection], [], [], timeout)[0]:
+                return False
+
+            listenConnection.poll()
+            notified = bool(listenConnection.notifies)
+            listenConnection.notifies.clear()
+            return notified
+
+        except (OSError, connection.Database.Error):
+            self.close()
+            time.sleep(timeout)
+            return False
+
+    def close(self):
+        if self.listenConnection is not None:
+            try:
+                self.listenConnection.close()
+            except connection.Database.Error:
+                pass
+            self.listenConnection = None
@@ -102,6 +102,28 @@ CACHES = {
     }
 }
 
+# Quiz attempt write-behind: buffer in-progress answers in Redis and flush them to the database in bulk
+QUIZ_ATTEMPT_WRITE_BEHIND = config('QUIZ_ATTEMPT_WRITE_BEHIND', default=False, cast=bool)
+QUIZ_ATTEMPT_BUFFER_FLUSH_INTERVAL = config('QUIZ_ATTEMPT_BUFFER_FLUSH_INTERVAL', default=60, cast=int)
+
+# Seconds between sweeps that submit attempts whose deadline has passed
+QUIZ_ATTEMPT_EXPIRY_SWEEP_INTERVAL = config('QUIZ_ATTEMPT_EXPIRY_SWEEP_INTERVAL', default=60, cast=int)
+
+# Seconds a claimed task stays leased to its worker without a heartbeat before it is handed out again
+TASK_LEASE_SECONDS = config('TASK_LEASE_SECONDS', default=60, cast=int)
+
+# Days a COMPLETED or FAILED task stays in tasks_task before archivetasks moves it out
+TASK_ARCHIVE_AFTER_DAYS = config('TASK_ARCHIVE_AFTER_DAYS', default=30, cast=int)
+# Cron expression of the worker's archival run, empty to archive only through the archivetasks command
+TASK_ARCHIVE_SCHEDULE = config('TASK_ARCHIVE_SCHEDULE', default='30 3 * * *')
+
+# Port the task worker serves Prometheus metrics on, 0 to log a periodic summary instead
+TASK_METRICS_PORT = config('TASK_METRICS_PORT', default=0, cast=int)
+
+# Emails per second the task workers send together, with bursts of up to TASK_EMAIL_RATE_BURST, 0 for no limit
+TASK_EMAIL_RATE_LIMIT = config('TASK_EMAIL_RATE_LIMIT', default=0, cast=float)
+TASK_EMAIL_RATE_BURST = config('TASK_EMAIL_RATE_BURST', default=20, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -157,6 +179,8 @@ EMAIL_HOST = config('EMAIL_HOST', cast=str)
 EMAIL_PORT = config('EMAIL_PORT', cast=int)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', cast=str)
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', cast=str)
+# Where django.core.mail.backends.filebased.EmailBackend writes emails instead of sending them
+EMAIL_FILE_PATH = config('EMAIL_FILE_PATH', default=os.path.join(BASE_DIR, 'sent_emails'))
 
 # Additional settings
 if DEBUG:
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from tasks.models import Task
+from tasks.models import Task, TaskArchive, TaskSchedule
 
 
 @admin.register(Task)
@@ -8,10 +8,35 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = [
         'id',
         'name',
+        'lane',
         'status',
         'tries',
         'maxTries',
         'scheduledAt',
         'startedAt',
         'finishedAt',
+        'leaseExpiresAt',
+        'dedupKey',
+    ]
+
+
+@admin.register(TaskArchive)
+class TaskArchiveAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'taskId',
+        'name',
+        'status',
+        'tries',
+        'finishedAt',
+    ]
+
+
+@admin.register(TaskSchedule)
+class TaskScheduleAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'name',
+        'nextRunAt',
+        'lastRunAt',
     ]
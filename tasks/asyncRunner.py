@@ -0,0 +1,27 @@
+import asyncio
+import threading
+from concurrent.futures import wait
+
+
+class AsyncTaskRunner:
+    """An event loop on its own thread for handlers whose run is a coroutine function."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.futures = set()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='async-tasks', daemon=True)
+        self.thread.start()
+
+    def submit(self, coroutine):
+        """Schedule coroutine on the loop and return a concurrent.futures.Future of its result."""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+        return future
+
+    def close(self):
+        """Let the running tasks finish, then stop the loop."""
+        wait(list(self.futures))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
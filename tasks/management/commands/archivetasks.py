@@ -0,0 +1,42 @@
+import contextlib
+import gzip
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Move finished tasks older than --days out of tasks_task, into the archive table or a gzipped JSONL file'
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.TASK_ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=Command.BATCH_SIZE)
+        parser.add_argument(
+            '--output',
+            help='Append the tasks as JSON lines to this gzip file instead of the archive table.',
+        )
+
+    def handle(self, *args, **options):
+        batchSize = options['batch_size']
+        finishedBefore = timezone.now() - timedelta(days=options['days'])
+        archived = 0
+
+        with contextlib.ExitStack() as stack:
+            output = None
+            if options['output']:
+                output = stack.enter_context(gzip.open(options['output'], 'at', encoding='utf-8'))
+
+            while True:
+                moved = Task.objects.archiveBatch(finishedBefore, batchSize, output)
+                if not moved:
+                    break
+
+                archived += moved
+                self.stdout.write(f'Archived {archived} tasks...')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} tasks in total.'))
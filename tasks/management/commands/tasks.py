@@ -1,17 +1,48 @@
-import importlib
+import asyncio
+import copy
+import multiprocessing
+import signal
+import threading
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from argparse import ArgumentTypeError
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import close_old_connections, connections
 from django.utils import timezone
 
-from tasks.models import Task
+from onequiz.operations.rateLimitOperations import takeTokens
+from onequiz.operations.taskOperations import TaskListener, isListenSupported
+from tasks.asyncRunner import AsyncTaskRunner
+from tasks.metrics import metrics, startMetricsServer
+from tasks.models import Task, TaskSchedule
+from tasks.registry import getTaskHandler, getTaskHandlers
+from tasks.schedules import parseSchedule
 
-CHECK_INTERVAL = 10  # seconds between loops
-BATCH_SIZE = 10  # number of tasks to process per batch
-MAX_WORKERS = 5  # number of threads for parallel execution
+CHECK_INTERVAL = 10  # seconds to wait for a notification before polling anyway
+BATCH_SIZE = 10  # default maximum number of tasks claimed at once
+MAX_WORKERS = 5  # default number of threads for parallel execution
+SHUTDOWN_TIMEOUT = 60  # seconds a child process gets to finish its running tasks before it is killed
+RESTART_DELAY = 5  # seconds between restarts of a child process that keeps crashing
+METRICS_DUMP_INTERVAL = 60  # seconds between metric summaries written to stdout when /metrics is not served
+LANE_POLL_INTERVAL = 1  # seconds between claims while a lane is full, as finishing tasks do not notify
+ASYNC_SLOTS = 100  # default number of tasks of async handlers running at once on the event loop
+ASYNC_LANE = object()  # stands for the event loop's slots among the lanes, whatever lanes the worker runs
+
+
+def parseLanes(value):
+    """Parse 'interactive=2,bulk=4' into {'interactive': 2, 'bulk': 4}."""
+    lanes = {}
+    for lane in value.split(","):
+        name, _, threads = lane.strip().partition("=")
+        if not name or not threads.isdigit() or int(threads) < 1:
+            raise ArgumentTypeError(f"Expected lane=threads, got '{lane}'")
+        lanes[name] = int(threads)
+    return lanes
 
 
 class Command(BaseCommand):
@@ -23,95 +54,460 @@ class Command(BaseCommand):
             action="store_true",
             help="Run one iteration and exit (for cron/testing).",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=MAX_WORKERS,
+            help="Number of threads running tasks.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Maximum number of tasks claimed at once.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes, each with its own database connections and threads.",
+        )
+        parser.add_argument(
+            "--lanes",
+            type=parseLanes,
+            help="Only run these lanes, each with its own threads, e.g. interactive=2,bulk=4. Replaces --workers.",
+        )
+        parser.add_argument(
+            "--async-slots",
+            type=int,
+            default=ASYNC_SLOTS,
+            help="Number of tasks of async handlers running at once on the event loop, besides the threads.",
+        )
+        parser.add_argument(
+            "--metrics-port",
+            type=int,
+            default=settings.TASK_METRICS_PORT,
+            help="Serve /metrics on this port, the next ports for further processes. 0 logs a summary instead.",
+        )
 
     def handle(self, *args, **options):
+        self.stopEvent = threading.Event()
+        self.scheduleRecurring = True
+        self.processIndex = 0
+
+        if options["processes"] > 1 and not options["once"]:
+            self._supervise(options)
+        else:
+            signal.signal(signal.SIGTERM, self._stop)
+            self._runWorker(options)
+
+    def _stop(self, signum, frame):
+        self.stdout.write(self.style.WARNING("🛑 Stopping after the running tasks finish..."))
+        self.stopEvent.set()
+
+    def _supervise(self, options):
+        """Fork the worker processes, restart the ones that crash and stop them all on SIGTERM or SIGINT."""
+        processes = options["processes"]
+        self.stdout.write(self.style.SUCCESS(f"🚀 Task Supervisor Started with {processes} worker processes!"))
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        # Children must open their own connections instead of sharing the parent's sockets
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = {}
+        startedAt = {}
+
+        while not self.stopEvent.is_set():
+            for index in range(processes):
+                child = children.get(index)
+                if child is not None and child.is_alive():
+                    continue
+
+                if child is not None:
+                    self.stderr.write(
+                        self.style.ERROR(f"💥 Worker process {index} (pid={child.pid}) exited with {child.exitcode}")
+                    )
+                    child.join()
+                    del children[index]
+
+                if index in startedAt and time.monotonic() - startedAt[index] < RESTART_DELAY:
+                    # Crashed right after starting, give whatever broke it a moment before trying again
+                    continue
+
+                children[index] = context.Process(target=self._runChild, args=(options, index), daemon=False)
+                children[index].start()
+                startedAt[index] = time.monotonic()
+                self.stdout.write(self.style.NOTICE(f"👷 Worker process {index} started (pid={children[index].pid})"))
+
+            self.stopEvent.wait(1)
+
+        for child in children.values():
+            if child.is_alive():
+                child.terminate()
+        for child in children.values():
+            child.join(SHUTDOWN_TIMEOUT)
+            if child.is_alive():
+                self.stderr.write(self.style.ERROR(f"🔪 Killing worker process pid={child.pid}"))
+                child.kill()
+                child.join()
+        self.stdout.write(self.style.SUCCESS("👋 Task Supervisor stopped."))
+
+    def _runChild(self, options, index):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, self._stop)
+        self.stopEvent = threading.Event()
+        # Only one process per host schedules tasks and reaps expired leases; across hosts the scheduler lock decides
+        self.scheduleRecurring = index == 0
+        self.processIndex = index
+        self._runWorker(options)
+
+    def _runWorker(self, options):
+        # Threads per lane, None standing for every lane when the worker is not dedicated to any
+        self.laneSlots = options["lanes"] or {None: options["workers"]}
+        self.throttledUntil = {}
+        self.parsedSchedules = {}
+        # when each task running on a thread actually started, as it may first wait for its concurrency limit
+        self.runStartedAt = {}
+        workers = sum(self.laneSlots.values())
+        batchSize = options["batch_size"]
+
         self.stdout.write(self.style.SUCCESS("🚀 Task Worker Started (multi-threaded mode)!"))
-        self.stdout.write(self.style.NOTICE(f"⚙️  Using {MAX_WORKERS} threads, batch size {BATCH_SIZE}\n"))
+        self.stdout.write(self.style.NOTICE(f"⚙️  Using {workers} threads, batch size {batchSize}\n"))
+        if options["lanes"]:
+            lanes = ", ".join(f"{lane}={threads}" for lane, threads in self.laneSlots.items())
+            self.stdout.write(self.style.NOTICE(f"🛣️  Running lanes {lanes}\n"))
+
+        self.handlers = getTaskHandlers()
+        self.semaphores = {
+            name: threading.BoundedSemaphore(handler.concurrency)
+            for name, handler in self.handlers.items() if handler.concurrency is not None
+        }
+        self.stdout.write(self.style.NOTICE(f"🧩 {len(self.handlers)} task handlers registered\n"))
+
+        # Tasks of async handlers never take a thread, they run on one event loop with slots of their own
+        self.asyncNames = [name for name, handler in self.handlers.items() if handler.isAsync]
+        self.asyncSlots = options["async_slots"]
+        self.asyncRunner = AsyncTaskRunner() if self.asyncNames else None
+        if self.asyncRunner is not None:
+            asyncHandlers = len(self.asyncNames)
+            self.stdout.write(
+                self.style.NOTICE(f"⚡ {asyncHandlers} async task handlers, {self.asyncSlots} event loop slots\n")
+            )
+
+        if options["metrics_port"]:
+            port = options["metrics_port"] + self.processIndex
+            startMetricsServer(port)
+            self.stdout.write(self.style.NOTICE(f"📊 Serving metrics on :{port}/metrics\n"))
 
-        runOnce = options["once"]
+        listener = TaskListener()
+        if isListenSupported():
+            self.stdout.write(self.style.NOTICE("📡 Waiting on LISTEN notifications between polls\n"))
 
-        while True:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            if options["once"]:
+                self._runOnce(executor, batchSize)
+            else:
+                self._runForever(executor, listener, batchSize, dumpMetrics=not options["metrics_port"])
+        if self.asyncRunner is not None:
+            self.asyncRunner.close()
+        listener.close()
+
+    def _groupTasks(self, tasksBatch):
+        """One group per task, except that every task of a batchable handler runs in a single group."""
+        groups = {}
+        for task in tasksBatch:
+            handler = self.handlers.get(task.name)
+            key = task.name if handler is not None and handler.batchable else task.id
+            groups.setdefault(key, []).append(task)
+        return list(groups.values())
+
+    def _runOnce(self, executor, batchSize):
+        """Claim one batch, run it and return once every task of it has finished."""
+        self._reapExpiredLeases()
+        self._scheduleDueTasks()
+        lanes = None if None in self.laneSlots else list(self.laneSlots)
+        tasksBatch = self._applyRateLimits(Task.objects.claim(batchSize, self._getThrottledNames(), lanes=lanes))
+        groups = self._fillBatches(self._groupTasks(tasksBatch))
+        self.stdout.write(f"📋 {sum(len(tasks) for tasks in groups)} task(s) claimed.")
+        running = {self._submit(executor, tasks): tasks for tasks in groups}
+        while running:
+            wait(running, timeout=CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+            running = {future: tasks for future, tasks in running.items() if not future.done()}
+            self._failTimedOutTasks(running)
+            self._heartbeat(running)
+
+    def _fillBatches(self, groups):
+        """Top the groups of batchable handlers up to their batchSize with further due tasks of their kind."""
+        for tasks in groups:
+            name = tasks[0].name
+            handler = self.handlers.get(name)
+            if handler is None or not handler.batchable or name in self._getThrottledNames():
+                continue
+            if len(tasks) < handler.batchSize:
+                tasks.extend(self._applyRateLimits(Task.objects.claim(handler.batchSize - len(tasks), names=[name])))
+        return groups
+
+    def _submit(self, executor, tasks):
+        if tasks[0].name in self.asyncNames:
+            return self.asyncRunner.submit(self._executeTasksAsync(tasks))
+        return executor.submit(self._executeTasks, tasks)
+
+    def _runForever(self, executor, listener, batchSize, dumpMetrics=False):
+        """Claim tasks for each lane as soon as its threads are free."""
+        running = {}
+        lastScheduledAt = None
+        lastDumpedAt = time.monotonic()
+
+        while not self.stopEvent.is_set():
+            laneFreeSlots, claimedFull = None, False
             try:
-                nowStr = timezone.now().strftime("%H:%M:%S")
-                self.stdout.write(f"🕒 [{nowStr}] Fetching up to {BATCH_SIZE} pending tasks...")
-
-                # Get a limited batch of pending tasks
-                tasksBatch = list(
-                    Task.objects.filter(
-                        scheduledAt__lte=timezone.now(),
-                        status=Task.Status.PENDING,
-                    )
-                    .order_by("priority", "scheduledAt")[:BATCH_SIZE]
-                )
+                running = {future: tasks for future, tasks in running.items() if not future.done()}
+                self._failTimedOutTasks(running)
 
-                taskCount = len(tasksBatch)
-                self.stdout.write(f"📋 {taskCount} task(s) fetched.")
+                if lastScheduledAt is None or time.monotonic() - lastScheduledAt >= CHECK_INTERVAL:
+                    self._heartbeat(running)
+                    self._reapExpiredLeases()
+                    self._scheduleDueTasks()
+                    lastScheduledAt = time.monotonic()
 
-                if taskCount == 0:
-                    self.stdout.write("💤 No tasks available right now.\n")
-                else:
-                    startBatchTime = timezone.now()
-
-                    # Run in parallel threads
-                    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                        futures = {executor.submit(self._executeTask, t): t for t in tasksBatch}
-
-                        completed = 0
-                        for future in as_completed(futures):
-                            task = futures[future]
-                            try:
-                                result = future.result()
-                                if result:
-                                    completed += 1
-                            except Exception as e:
-                                self.stderr.write(
-                                    self.style.ERROR(f"🔥 Error in thread for task {task.id}: {e}")
-                                )
-
-                    endBatchTime = timezone.now()
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"✅ Completed {completed}/{taskCount} tasks in "
-                            f"{(endBatchTime - startBatchTime).total_seconds():.2f}s at "
-                            f"{endBatchTime.strftime('%H:%M:%S')}\n"
+                if dumpMetrics and time.monotonic() - lastDumpedAt >= METRICS_DUMP_INTERVAL:
+                    for line in metrics.summary():
+                        self.stdout.write(f"📊 {line}")
+                    lastDumpedAt = time.monotonic()
+
+                laneFreeSlots = self._getLaneFreeSlots(running)
+                for lane, freeSlots in laneFreeSlots.items():
+                    if freeSlots <= 0:
+                        continue
+
+                    requested = min(freeSlots, batchSize)
+                    excludeNames = self._getNamesAtCapacity(running) + self._getThrottledNames()
+                    if lane is ASYNC_LANE:
+                        lanes = None if None in self.laneSlots else list(self.laneSlots)
+                        tasksBatch = Task.objects.claim(requested, excludeNames, names=self.asyncNames, lanes=lanes)
+                    else:
+                        tasksBatch = Task.objects.claim(
+                            requested,
+                            excludeNames + self.asyncNames,
+                            lanes=None if lane is None else [lane],
                         )
-                    )
+                    claimedFull = claimedFull or len(tasksBatch) == requested
+                    groups = self._fillBatches(self._groupTasks(self._applyRateLimits(tasksBatch)))
+                    if groups:
+                        claimed = sum(len(tasks) for tasks in groups)
+                        self.stdout.write(f"📋 {claimed} task(s) claimed, {len(running)} still running.")
+                    for tasks in groups:
+                        running[self._submit(executor, tasks)] = tasks
 
             except Exception as e:
                 self.stderr.write(self.style.ERROR(f"💥 Worker loop error: {e}"))
                 self.stderr.write(traceback.format_exc())
 
-            if runOnce:
-                break
+            if laneFreeSlots is not None and all(freeSlots <= 0 for freeSlots in laneFreeSlots.values()):
+                # Every thread is busy, wait for the first one to free up
+                wait(running, timeout=CHECK_INTERVAL, return_when=FIRST_COMPLETED)
+            elif claimedFull:
+                # There may be more due tasks waiting, claim them straight away
+                continue
+            else:
+                # A full lane is polled often, its threads free up without any notification
+                isLaneFull = laneFreeSlots is not None and any(freeSlots <= 0 for freeSlots in laneFreeSlots.values())
+                timeout = LANE_POLL_INTERVAL if isLaneFull else CHECK_INTERVAL
+                self.stdout.write(self.style.NOTICE(f"🔁 Waiting up to {timeout}s for new tasks...\n"))
+                if listener.wait(timeout):
+                    self.stdout.write("🔔 Woken up by a new task.")
+
+    def _heartbeat(self, running):
+        """Keep the leases of everything this process is still running from expiring."""
+        Task.objects.heartbeat([task.id for tasks in running.values() for task in tasks])
+
+    def _getLaneFreeSlots(self, running):
+        runningCounts = Counter(
+            ASYNC_LANE if tasks[0].name in self.asyncNames else tasks[0].lane for tasks in running.values()
+        )
+        if None in self.laneSlots:
+            laneFreeSlots = {None: self.laneSlots[None] - (len(running) - runningCounts[ASYNC_LANE])}
+        else:
+            laneFreeSlots = {lane: slots - runningCounts[lane] for lane, slots in self.laneSlots.items()}
+
+        if self.asyncNames:
+            laneFreeSlots[ASYNC_LANE] = self.asyncSlots - runningCounts[ASYNC_LANE]
+        return laneFreeSlots
+
+    def _getThrottledNames(self):
+        now = time.monotonic()
+        return [name for name, until in self.throttledUntil.items() if until > now]
+
+    def _applyRateLimits(self, tasksBatch):
+        """Hand back the claimed tasks over their handler's rate limit without using up a try."""
+        allowed, limited = [], defaultdict(list)
+        for task in tasksBatch:
+            handler = self.handlers.get(task.name)
+            if handler is None or handler.rateLimit is None:
+                allowed.append(task)
+            else:
+                limited[task.name].append(task)
+
+        for name, tasks in limited.items():
+            handler = self.handlers[name]
+            try:
+                granted = takeTokens(name, len(tasks), handler.rateLimit, handler.rateBurst)
+            except Exception as e:
+                # Rather run over the limit than stall the tasks while Redis is unreachable
+                self.stderr.write(self.style.ERROR(f"💥 Rate limit of {name} unavailable: {e}"))
+                granted = len(tasks)
+
+            allowed.extend(tasks[:granted])
+            if granted < len(tasks):
+                delay = 1 / handler.rateLimit
+                Task.objects.release([task.id for task in tasks[granted:]], delay)
+                self.throttledUntil[name] = time.monotonic() + delay
+                metrics.recordOutcome(name, "throttled", len(tasks) - granted)
+        return allowed
+
+    def _getNamesAtCapacity(self, running):
+        """Names of handlers already running as many tasks as their concurrency allows in this process."""
+        runningCounts = Counter(tasks[0].name for tasks in running.values())
+        return [
+            name for name, handler in self.handlers.items()
+            if handler.concurrency is not None and runningCounts[name] >= handler.concurrency
+        ]
+
+    def _failTimedOutTasks(self, running):
+        """Retry or fail tasks that ran past their handler's timeout, the thread itself cannot be interrupted."""
+        for tasks in running.values():
+            handler = self.handlers.get(tasks[0].name)
+            # async handlers are cancelled at their timeout by the event loop itself
+            if handler is None or handler.timeout is None or handler.isAsync:
+                continue
+
+            runStartedAt = self.runStartedAt.get(tasks[0].id)
+            if runStartedAt is None or time.monotonic() - runStartedAt <= handler.timeout:
+                continue
+
+            # Timed out once only; the thread records nothing when it finishes, as the row is no longer RUNNING
+            for task in tasks:
+                self.runStartedAt.pop(task.id, None)
+            error = TimeoutError(f"Timed out after {handler.timeout}s")
+            outcomes = [handler.finish(copy.copy(task), error) for task in tasks]
+            timedOut = len([outcome for outcome in outcomes if outcome != "superseded"])
+            if timedOut:
+                metrics.recordOutcome(tasks[0].name, "timed_out", timedOut)
+                self.stderr.write(self.style.ERROR(f"⏰ {timedOut} {tasks[0].name} task(s) timed out"))
+
+    def _reapExpiredLeases(self):
+        """Requeue tasks whose worker died without finishing them."""
+        if not self.scheduleRecurring:
+            return
+
+        requeued, failed = Task.objects.reapExpiredLeases()
+        if requeued or failed:
+            self.stderr.write(
+                self.style.WARNING(f"🪦 Reclaimed {requeued + failed} task(s) with expired leases, {failed} failed")
+            )
+
+    def _scheduleDueTasks(self):
+        """Enqueue the scheduled tasks that are due, unless a worker elsewhere holds the scheduler lock."""
+        if not self.scheduleRecurring:
+            return
+
+        schedules = {}
+        for name, handler in self.handlers.items():
+            schedule = handler.getSchedule()
+            if schedule is None:
+                continue
 
-            self.stdout.write(self.style.NOTICE(f"🔁 Sleeping for {CHECK_INTERVAL}s...\n"))
-            time.sleep(CHECK_INTERVAL)
+            try:
+                if schedule not in self.parsedSchedules:
+                    self.parsedSchedules[schedule] = parseSchedule(schedule)
+                schedules[name] = self.parsedSchedules[schedule]
+            except ValueError as e:
+                # A broken schedule must not hold back the others
+                self.stderr.write(self.style.ERROR(f"💥 Schedule of {name} is invalid: {e}"))
+
+        for name in TaskSchedule.objects.enqueueDue(schedules):
+            self.stdout.write(self.style.NOTICE(f"⏰ Scheduled {name}"))
 
-    def _executeTask(self, task):
-        """Safely execute one task."""
+    def _executeTasks(self, tasks):
+        """Safely execute a group of claimed tasks of the same kind."""
+        # Pool threads live as long as the worker, so drop connections that went stale while the thread was idle
+        close_old_connections()
+        name = tasks[0].name
+        taskIds = [task.id for task in tasks]
         taskStart = timezone.now().strftime("%H:%M:%S")
-        self.stdout.write(self.style.NOTICE(f"🚧 [{taskStart}] Executing: {task.name} (id={task.id})"))
+        self.stdout.write(self.style.NOTICE(f"🚧 [{taskStart}] Executing: {name} (ids={taskIds})"))
 
         try:
-            with transaction.atomic():
-                # Lock this task row to avoid double-execution
-                task = Task.objects.select_for_update().get(pk=task.pk)
-                if task.status != Task.Status.PENDING:
-                    self.stdout.write(f"⚠️ Skipping task {task.id} (status={task.status})")
-                    return False
-
-                module = importlib.import_module(f"tasks.tasks.{task.name}")
-                clazz = getattr(module, task.name)
-                instance = clazz()
-                instance.execute(task)
+            # The tasks were claimed as RUNNING, so they run outside any transaction and without holding row locks
+            handler = getTaskHandler(name)
+            semaphore = self.semaphores.get(name)
+            if semaphore is not None:
+                semaphore.acquire()
+            try:
+                runStart = time.monotonic()
+                self.runStartedAt.update((taskId, runStart) for taskId in taskIds)
+                if handler.batchable:
+                    outcomes = handler.executeBatch(tasks)
+                else:
+                    outcomes = [handler.execute(tasks[0])]
+                # A batch runs as one call, so its time is shared evenly between its tasks
+                runSeconds = (time.monotonic() - runStart) / len(tasks)
+            finally:
+                for taskId in taskIds:
+                    self.runStartedAt.pop(taskId, None)
+                if semaphore is not None:
+                    semaphore.release()
+
+            for task, outcome in zip(tasks, outcomes):
+                metrics.recordRun(task, runSeconds, outcome)
 
             endTime = timezone.now().strftime("%H:%M:%S")
-            self.stdout.write(self.style.SUCCESS(f"🎉 [{endTime}] Done: {task.name} (id={task.id})"))
+            self.stdout.write(self.style.SUCCESS(f"🎉 [{endTime}] Done: {name} (ids={taskIds})"))
             return True
 
         except Exception as e:
             self.stderr.write(
-                self.style.ERROR(f"🔥 Error executing {task.name} (id={task.id}): {e}")
+                self.style.ERROR(f"🔥 Error executing {name} (ids={taskIds}): {e}")
             )
             self.stderr.write(traceback.format_exc())
+            self._failClaimedTasks(name, taskIds, traceback.format_exc())
             return False
+
+    async def _executeTasksAsync(self, tasks):
+        """Safely execute a group of claimed tasks of an async handler, concurrently on the event loop."""
+        name = tasks[0].name
+        taskIds = [task.id for task in tasks]
+        taskStart = timezone.now().strftime("%H:%M:%S")
+        self.stdout.write(self.style.NOTICE(f"🚧 [{taskStart}] Executing: {name} (ids={taskIds})"))
+
+        async def executeTask(handler, task):
+            runStart = time.monotonic()
+            outcome = await handler.executeAsync(task)
+            metrics.recordRun(task, time.monotonic() - runStart, outcome)
+
+        try:
+            handler = getTaskHandler(name)
+            await asyncio.gather(*[executeTask(handler, task) for task in tasks])
+
+            endTime = timezone.now().strftime("%H:%M:%S")
+            self.stdout.write(self.style.SUCCESS(f"🎉 [{endTime}] Done: {name} (ids={taskIds})"))
+            return True
+
+        except Exception as e:
+            self.stderr.write(
+                self.style.ERROR(f"🔥 Error executing {name} (ids={taskIds}): {e}")
+            )
+            self.stderr.write(traceback.format_exc())
+            await sync_to_async(self._failClaimedTasks)(name, taskIds, traceback.format_exc())
+            return False
+
+    def _failClaimedTasks(self, name, taskIds, error):
+        metrics.recordOutcome(name, "failed", len(taskIds))
+        # Claimed tasks that could not even be started must not stay RUNNING forever
+        Task.objects.filter(id__in=taskIds, status=Task.Status.RUNNING).update(
+            status=Task.Status.FAILED,
+            lastError=error,
+            finishedAt=timezone.now(),
+        )
@@ -0,0 +1,158 @@
+import bisect
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.db import connection
+from django.db.models import Count, Min
+from django.utils import timezone
+
+# upper bounds in seconds, wide enough for both quick emails and exam-end marking backlogs
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def formatLabels(**labels):
+    """Prometheus label pairs, with backslashes, quotes and newlines in the values escaped."""
+    escaped = {
+        key: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        for key, value in labels.items()
+    }
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped.items()) + '}'
+
+
+class Histogram:
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulativeCounts(self):
+        total = 0
+        for bound, count in zip([*self.buckets, '+Inf'], self.counts):
+            total += count
+            yield bound, total
+
+
+class TaskMetrics:
+    """In-process counters and histograms of the worker, labelled by Task.name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outcomes = defaultdict(int)  # (name, outcome) -> count
+        self.waitSeconds = defaultdict(Histogram)  # name -> time from scheduledAt to startedAt
+        self.runSeconds = defaultdict(Histogram)  # name -> time spent in the handler
+
+    def recordRun(self, task, runSeconds, outcome):
+        with self.lock:
+            self.outcomes[task.name, outcome] += 1
+            self.runSeconds[task.name].observe(runSeconds)
+            if task.startedAt is not None:
+                self.waitSeconds[task.name].observe(max((task.startedAt - task.scheduledAt).total_seconds(), 0))
+
+    def recordOutcome(self, name, outcome, count=1):
+        with self.lock:
+            self.outcomes[name, outcome] += count
+
+    def getQueueDepth(self):
+        from tasks.models import Task
+
+        depth = Task.objects.filter(
+            status__in=[Task.Status.PENDING, Task.Status.RUNNING],
+        ).values('name', 'status').annotate(count=Count('id')).order_by('name', 'status')
+        oldestDue = Task.objects.filter(
+            status=Task.Status.PENDING,
+            scheduledAt__lte=timezone.now(),
+        ).values('name').annotate(oldest=Min('scheduledAt')).order_by('name')
+        return list(depth), list(oldestDue)
+
+    def render(self):
+        """The metrics in the Prometheus text exposition format."""
+        depth, oldestDue = self.getQueueDepth()
+        now = timezone.now()
+        lines = [
+            '# HELP onequiz_task_queue_depth Tasks waiting or running, by name and status.',
+            '# TYPE onequiz_task_queue_depth gauge',
+            *[
+                f'onequiz_task_queue_depth{formatLabels(name=row["name"], status=row["status"])} {row["count"]}'
+                for row in depth
+            ],
+            '# HELP onequiz_task_oldest_due_seconds Age of the oldest due task that has not been claimed yet.',
+            '# TYPE onequiz_task_oldest_due_seconds gauge',
+            *[
+                f'onequiz_task_oldest_due_seconds{formatLabels(name=row["name"])} '
+                f'{(now - row["oldest"]).total_seconds():.3f}'
+                for row in oldestDue
+            ],
+        ]
+
+        with self.lock:
+            lines.append('# HELP onequiz_tasks_total Tasks run by this worker, by name and outcome.')
+            lines.append('# TYPE onequiz_tasks_total counter')
+            for (name, outcome), count in sorted(self.outcomes.items()):
+                lines.append(f'onequiz_tasks_total{formatLabels(name=name, outcome=outcome)} {count}')
+
+            for metric, histograms, description in [
+                ('onequiz_task_wait_seconds', self.waitSeconds, 'Time from scheduledAt until a worker started it.'),
+                ('onequiz_task_run_seconds', self.runSeconds, 'Time spent running the task handler.'),
+            ]:
+                lines.append(f'# HELP {metric} {description}')
+                lines.append(f'# TYPE {metric} histogram')
+                for name, histogram in sorted(histograms.items()):
+                    for bound, count in histogram.cumulativeCounts():
+                        lines.append(f'{metric}_bucket{formatLabels(name=name, le=bound)} {count}')
+                    lines.append(f'{metric}_sum{formatLabels(name=name)} {histogram.sum:.6f}')
+                    lines.append(f'{metric}_count{formatLabels(name=name)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """One line per task name for the periodic log dump."""
+        with self.lock:
+            lines = []
+            for name in sorted({name for name, _ in self.outcomes}):
+                run, wait = self.runSeconds[name], self.waitSeconds[name]
+                lines.append(
+                    f'{name}: {self.outcomes[name, "completed"]} completed, {self.outcomes[name, "failed"]} failed, '
+                    f'{self.outcomes[name, "retried"]} retried, '
+                    f'avg wait {wait.sum / max(wait.count, 1):.2f}s, avg run {run.sum / max(run.count, 1):.2f}s'
+                )
+            return lines
+
+
+metrics = TaskMetrics()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+
+        try:
+            body = metrics.render().encode()
+        finally:
+            # Each request runs on its own thread, which must not leave a database connection behind
+            connection.close()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def startMetricsServer(port):
+    """Serve /metrics on a daemon thread for as long as the worker process runs."""
+    server = ThreadingHTTPServer(('', port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='task-metrics', daemon=True).start()
+    return server
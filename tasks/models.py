@@ -1,8 +1,18 @@
-from django.db import models
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from core.models import BaseModel
+from onequiz.operations.taskOperations import SCHEDULER_LOCK_ID, notifyTaskWorkersOnCommit, tryAdvisoryLock
+
+LEASE_EXPIRED_ERROR = 'Lease expired, the worker running this task stopped responding.'
+ARCHIVED_ERROR_LENGTH = 4000  # the tail of a traceback kept in the archive, where the exception itself is
 
 
 class Task(BaseModel):
@@ -23,9 +33,278 @@ class Task(BaseModel):
     startedAt = models.DateTimeField(null=True, blank=True)
     finishedAt = models.DateTimeField(null=True, blank=True)
     lastError = models.TextField(blank=True, null=True)
+    # a RUNNING task whose lease has expired belongs to a worker that died, and is handed out again
+    leaseExpiresAt = models.DateTimeField(null=True, blank=True)
+    # at most one PENDING or RUNNING task holds a given key, enqueueing another one coalesces onto it
+    dedupKey = models.CharField(max_length=255, null=True, blank=True)
+    # workers can be dedicated to lanes, so latency-sensitive tasks never wait behind bulk work; taken from the
+    # handler when left blank
+    lane = models.CharField(max_length=32, blank=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['status', 'scheduledAt'], name='idx-task-status-scheduledAt'),
+            models.Index(fields=['lane', 'status', 'scheduledAt'], name='idx-task-lane-status-sched'),
             models.Index(fields=['scheduledAt'], name='idx-quiz-scheduledAt'),
+            models.Index(fields=['leaseExpiresAt'], name='idx-task-running-lease', condition=Q(status='RUNNING')),
+            models.Index(
+                fields=['finishedAt'],
+                name='idx-task-finished',
+                condition=Q(status__in=['COMPLETED', 'FAILED']),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupKey'],
+                name='uq-task-active-dedup-key',
+                condition=Q(status__in=['PENDING', 'RUNNING']),
+            ),
         ]
+
+    def validateName(self):
+        from tasks.registry import isRegisteredTask
+
+        if not isRegisteredTask(self.name):
+            raise ValueError(f'Unknown task: {self.name}')
+
+    def assignLane(self):
+        from tasks.registry import getTaskHandler
+
+        if not self.lane:
+            self.lane = getTaskHandler(self.name).lane
+
+    def save(self, *args, **kwargs):
+        isNew = self._state.adding
+        if isNew:
+            self.validateName()
+            self.assignLane()
+        super(Task, self).save(*args, **kwargs)
+        if isNew and self.status == Task.Status.PENDING:
+            notifyTaskWorkersOnCommit()
+
+    class ModelManager(models.Manager):
+        def bulk_create(self, objs, *args, **kwargs):
+            objs = list(objs)
+            for task in objs:
+                task.validateName()
+                task.assignLane()
+            tasks = super().bulk_create(objs, *args, **kwargs)
+            if tasks:
+                notifyTaskWorkersOnCommit()
+            return tasks
+
+        def buildTask(self, name, data=None, dedupKey=None, **kwargs):
+            """An unsaved task for enqueueMany. Dedup keys are scoped to the task name."""
+            task = self.model(name=name, data=data, **kwargs)
+            if dedupKey is not None:
+                task.dedupKey = f'{name}:{dedupKey}'
+            return task
+
+        def enqueue(self, name, data=None, dedupKey=None, **kwargs):
+            """Create a task and return (task, created), reusing the active task with the same dedupKey."""
+            task = self.buildTask(name, data, dedupKey, **kwargs)
+            if task.dedupKey is None:
+                task.save()
+                return task, True
+
+            for attempt in range(3):
+                try:
+                    with transaction.atomic():
+                        task.save()
+                    return task, True
+                except IntegrityError:
+                    task.pk = None
+                    task._state.adding = True
+
+                existing = self.filter(
+                    dedupKey=task.dedupKey, status__in=[Task.Status.PENDING, Task.Status.RUNNING]
+                ).first()
+                if existing is not None:
+                    self.filter(
+                        id=existing.id, status=Task.Status.PENDING, scheduledAt__gt=task.scheduledAt
+                    ).update(scheduledAt=task.scheduledAt)
+                    return existing, False
+                # the task holding the key finished in between, so try to insert again
+
+            raise IntegrityError(f'Could not enqueue {name} with dedup key {dedupKey}')
+
+        def enqueueMany(self, tasks):
+            """Insert tasks built with buildTask in bulk, skipping those whose dedup key is held."""
+            tasks = list(tasks)
+            ignoreConflicts = any(task.dedupKey is not None for task in tasks)
+            return self.bulk_create(tasks, batch_size=1000, ignore_conflicts=ignoreConflicts)
+
+        def enqueueOnCommit(self, name, data=None, dedupKey=None, **kwargs):
+            """Enqueue once the surrounding transaction commits, and not at all if it rolls back."""
+            transaction.on_commit(lambda: self.enqueue(name, data, dedupKey, **kwargs))
+
+        def enqueueManyOnCommit(self, tasks):
+            tasks = list(tasks)
+            transaction.on_commit(lambda: self.enqueueMany(tasks))
+
+        def claim(self, batchSize, excludeNames=None, names=None, lanes=None):
+            """Move up to batchSize due tasks to RUNNING and return them."""
+            with transaction.atomic():
+                dueTasks = (
+                    self.select_for_update(skip_locked=True)
+                    .filter(status=Task.Status.PENDING, scheduledAt__lte=timezone.now())
+                    .exclude(name__in=excludeNames or [])
+                )
+                if names is not None:
+                    dueTasks = dueTasks.filter(name__in=names)
+                if lanes is not None:
+                    dueTasks = dueTasks.filter(lane__in=lanes)
+                taskIds = list(dueTasks.order_by('priority', 'scheduledAt').values_list('id', flat=True)[:batchSize])
+                if not taskIds:
+                    return []
+
+                now = timezone.now()
+                self.filter(id__in=taskIds).update(
+                    status=Task.Status.RUNNING,
+                    tries=F('tries') + 1,
+                    startedAt=now,
+                    leaseExpiresAt=now + timedelta(seconds=settings.TASK_LEASE_SECONDS),
+                )
+            return list(self.filter(id__in=taskIds).order_by('priority', 'scheduledAt'))
+
+        def release(self, taskIds, delay):
+            """Hand claimed tasks back without counting the try, to be claimed again after delay seconds."""
+            return self.filter(id__in=taskIds, status=Task.Status.RUNNING).update(
+                status=Task.Status.PENDING,
+                tries=F('tries') - 1,
+                startedAt=None,
+                leaseExpiresAt=None,
+                scheduledAt=timezone.now() + timedelta(seconds=delay),
+            )
+
+        def heartbeat(self, taskIds):
+            """Extend the leases of tasks that are still running."""
+            return self.filter(id__in=taskIds, status=Task.Status.RUNNING).update(
+                leaseExpiresAt=timezone.now() + timedelta(seconds=settings.TASK_LEASE_SECONDS)
+            )
+
+        def reapExpiredLeases(self):
+            """Requeue or fail tasks whose lease expired and return (requeued, failed)."""
+            now = timezone.now()
+            expired = self.filter(status=Task.Status.RUNNING, leaseExpiresAt__lt=now)
+            failed = expired.filter(tries__gte=F('maxTries')).update(
+                status=Task.Status.FAILED,
+                lastError=LEASE_EXPIRED_ERROR,
+                finishedAt=now,
+                leaseExpiresAt=None,
+            )
+            requeued = expired.update(
+                status=Task.Status.PENDING,
+                lastError=LEASE_EXPIRED_ERROR,
+                scheduledAt=now,
+                leaseExpiresAt=None,
+            )
+            return requeued, failed
+
+        def archiveBatch(self, finishedBefore, batchSize, output=None):
+            """Move up to batchSize finished tasks to TaskArchive, or to output as JSON lines."""
+            with transaction.atomic():
+                tasks = list(
+                    self.select_for_update(skip_locked=True)
+                    .filter(status__in=[Task.Status.COMPLETED, Task.Status.FAILED], finishedAt__lt=finishedBefore)
+                    .order_by('id')[:batchSize]
+                )
+                if not tasks:
+                    return 0
+
+                archives = [TaskArchive.fromTask(task) for task in tasks]
+                if output is None:
+                    TaskArchive.objects.bulk_create(archives)
+                else:
+                    for archive in archives:
+                        output.write(json.dumps(archive.toDict(), cls=DjangoJSONEncoder) + '\n')
+
+                self.filter(id__in=[task.id for task in tasks]).delete()
+            return len(tasks)
+
+    objects = ModelManager()
+
+
+class TaskSchedule(BaseModel):
+    """When each scheduled task is next due, shared by every worker so a tick is enqueued once across the fleet."""
+    name = models.CharField(max_length=255, unique=True)
+    nextRunAt = models.DateTimeField()
+    lastRunAt = models.DateTimeField(null=True, blank=True)
+
+    class ModelManager(models.Manager):
+        def enqueueDue(self, schedules):
+            """Enqueue every due task of {name: schedule} and return the names enqueued."""
+            now = timezone.now()
+            enqueued = []
+            with transaction.atomic():
+                if not tryAdvisoryLock(SCHEDULER_LOCK_ID):
+                    return enqueued
+
+                taskSchedules = {
+                    taskSchedule.name: taskSchedule
+                    for taskSchedule in self.select_for_update().filter(name__in=list(schedules))
+                }
+                for name, schedule in schedules.items():
+                    taskSchedule = taskSchedules.get(name)
+                    if taskSchedule is None:
+                        self.create(name=name, nextRunAt=schedule.getNextRunAt(now))
+                        continue
+                    if taskSchedule.nextRunAt > now:
+                        continue
+
+                    # A run that is still pending or running absorbs the tick instead of queueing behind itself
+                    Task.objects.enqueue(name, dedupKey='schedule', scheduledAt=taskSchedule.nextRunAt)
+                    taskSchedule.lastRunAt = taskSchedule.nextRunAt
+                    taskSchedule.nextRunAt = schedule.getNextRunAt(now)
+                    taskSchedule.save(update_fields=['lastRunAt', 'nextRunAt', 'modifiedDttm'])
+                    enqueued.append(name)
+            return enqueued
+
+    objects = ModelManager()
+
+
+class TaskArchive(models.Model):
+    """A finished task moved out of tasks_task, without the bookkeeping columns of BaseModel."""
+    taskId = models.BigIntegerField()
+    name = models.CharField(max_length=255)
+    data = models.JSONField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=Task.Status.choices)
+    tries = models.PositiveSmallIntegerField()
+    createdDttm = models.DateTimeField()
+    startedAt = models.DateTimeField(null=True, blank=True)
+    finishedAt = models.DateTimeField(null=True, blank=True)
+    lastError = models.TextField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'finishedAt'], name='idx-task-archive-name-fin'),
+            models.Index(fields=['taskId'], name='idx-task-archive-task-id'),
+        ]
+
+    @classmethod
+    def fromTask(cls, task):
+        return cls(
+            taskId=task.id,
+            name=task.name,
+            data=task.data,
+            status=task.status,
+            tries=task.tries,
+            createdDttm=task.createdDttm,
+            startedAt=task.startedAt,
+            finishedAt=task.finishedAt,
+            lastError=task.lastError[-ARCHIVED_ERROR_LENGTH:] if task.lastError else task.lastError,
+        )
+
+    def toDict(self):
+        # isoformat keeps the microseconds that DjangoJSONEncoder would cut to milliseconds
+        return {
+            'taskId': self.taskId,
+            'name': self.name,
+            'data': self.data,
+            'status': self.status,
+            'tries': self.tries,
+            'createdDttm': self.createdDttm.isoformat(),
+            'startedAt': self.startedAt.isoformat() if self.startedAt else None,
+            'finishedAt': self.finishedAt.isoformat() if self.finishedAt else None,
+            'lastError': self.lastError,
+        }
@@ -0,0 +1,36 @@
+import importlib
+import pkgutil
+
+taskHandlers = None
+
+
+def discoverTaskHandlers():
+    """Import every module of tasks.tasks and instantiate the BaseTask subclass named after it."""
+    import tasks.tasks
+    from tasks.tasks.BaseTask import BaseTask
+
+    handlers = {}
+    for moduleInfo in pkgutil.iter_modules(tasks.tasks.__path__):
+        module = importlib.import_module(f'tasks.tasks.{moduleInfo.name}')
+        clazz = getattr(module, moduleInfo.name, None)
+        if isinstance(clazz, type) and issubclass(clazz, BaseTask) and not clazz.__dict__.get('abstract', False):
+            handlers[moduleInfo.name] = clazz()
+    return handlers
+
+
+def getTaskHandlers():
+    global taskHandlers
+    if taskHandlers is None:
+        taskHandlers = discoverTaskHandlers()
+    return taskHandlers
+
+
+def getTaskHandler(name):
+    handler = getTaskHandlers().get(name)
+    if handler is None:
+        raise ValueError(f'Unknown task: {name}')
+    return handler
+
+
+def isRegisteredTask(name):
+    return name in getTaskHandlers()
@@ -0,0 +1,84 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+class IntervalSchedule:
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def getNextRunAt(self, after):
+        return after + timedelta(seconds=self.seconds)
+
+
+class CronSchedule:
+    """Standard five field cron expression, evaluated in the local time zone."""
+    FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'Cron expression needs 5 fields: {expression}')
+
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = [
+            self.parseField(field, low, high) for field, (low, high) in zip(fields, CronSchedule.FIELD_RANGES)
+        ]
+        self.weekdays = {weekday % 7 for weekday in weekdays}
+        self.isDayRestricted = fields[2] != '*'
+        self.isWeekdayRestricted = fields[4] != '*'
+
+    @staticmethod
+    def parseField(field, low, high):
+        values = set()
+        for part in field.split(','):
+            valueRange, _, step = part.partition('/')
+            if valueRange == '*':
+                start, end = low, high
+            elif '-' in valueRange:
+                start, end = (int(value) for value in valueRange.split('-'))
+            else:
+                start = int(valueRange)
+                end = high if step else start
+
+            step = int(step) if step else 1
+            if not low <= start <= end <= high or step < 1:
+                raise ValueError(f'Invalid cron field: {field}')
+            values.update(range(start, end + 1, step))
+        return values
+
+    def isDayMatching(self, date):
+        dayMatches = date.day in self.days
+        # cron counts weekdays from Sunday, Python from Monday
+        weekdayMatches = (date.weekday() + 1) % 7 in self.weekdays
+        # like cron, either day field matches when both are restricted
+        if self.isDayRestricted and self.isWeekdayRestricted:
+            return dayMatches or weekdayMatches
+        return dayMatches and weekdayMatches
+
+    def getNextRunAt(self, after):
+        candidate = timezone.localtime(after).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        # Every match repeats within a few years (29 February on a given weekday), so the search always ends
+        limit = candidate + timedelta(days=366 * 8)
+
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = datetime(candidate.year + year, month + 1, 1)
+            elif not self.isDayMatching(candidate):
+                candidate = datetime.combine(candidate.date() + timedelta(days=1), time())
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return timezone.make_aware(candidate)
+
+        raise ValueError(f'Cron expression never matches: {self.expression}')
+
+
+def parseSchedule(schedule):
+    """A BaseTask.schedule, seconds between runs or a cron expression, as a schedule object."""
+    if isinstance(schedule, str):
+        return CronSchedule(schedule)
+    return IntervalSchedule(schedule)
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.mail import get_connection
+
+from tasks.tasks.BaseTask import BaseTask
+
+
+class BaseEmailTask(BaseTask):
+    """Claimed emails of one kind are sent over a single connection, each still finishing on its own Task row."""
+    abstract = True
+    batchable = True
+    lane = 'interactive'
+    rateLimit = settings.TASK_EMAIL_RATE_LIMIT or None
+    rateBurst = settings.TASK_EMAIL_RATE_BURST
+    timeout = 60
+    # mail outages hit every queued email at once, so spread the retries across the whole delay
+    retryDelay = 60
+    maxRetryDelay = 2 * 60 * 60
+    retryJitter = 1.0
+
+    def buildMessage(self, data):
+        """Override this method to render the EmailMessage of one task."""
+        raise NotImplementedError('Email tasks must implement buildMessage method')
+
+    def run(self, *args, **kwargs):
+        self.buildMessage(args[0]).send()
+
+    def executeBatch(self, taskInstances):
+        emailConnection = get_connection()
+        try:
+            emailConnection.open()
+        except Exception as error:
+            return [self.finish(taskInstance, error) for taskInstance in taskInstances]
+
+        outcomes, sent = {}, []
+        try:
+            for taskInstance in taskInstances:
+                try:
+                    message = self.buildMessage(taskInstance.data)
+                    message.connection = emailConnection
+                    emailConnection.send_messages([message])
+                except Exception as error:
+                    outcomes[taskInstance.id] = self.finish(taskInstance, error)
+                else:
+                    sent.append(taskInstance)
+        finally:
+            emailConnection.close()
+
+        outcomes.update(zip([taskInstance.id for taskInstance in sent], self.completeBatch(sent)))
+        return [outcomes[taskInstance.id] for taskInstance in taskInstances]
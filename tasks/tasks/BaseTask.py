@@ -1,38 +1,174 @@
+import asyncio
+import inspect
+import operator
+import random
 import traceback
 from datetime import timedelta
+from functools import reduce
 
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections
+from django.db.models import Q
+from django.db.models.functions import Now
+from django.http import Http404
 from django.utils import timezone
 
 from tasks.models import Task
 
 
+class NonRetryableTaskError(Exception):
+    """Raised by handlers for failures that another try cannot fix, such as bad task data."""
+
+
 class BaseTask:
+    """Base class of task handlers, one instance shared by every worker thread."""
+    # handlers must not keep per-run state on self; async handlers reach the ORM through sync_to_async
+    # set to True on base classes that are not tasks themselves
+    abstract = True
+    # maximum number of tasks of this kind running at once in a worker process, None for no limit
+    concurrency = None
+    # seconds after which a running task is considered stuck, None for no limit
+    timeout = None
+    # batchable handlers implement runBatch and receive every claimed task of their kind in one call, topped up to
+    # batchSize tasks as a batch takes a single thread however many tasks it holds
+    batchable = False
+    batchSize = 50
+    # workers started with --lanes only run the lanes they were given
+    lane = 'default'
+    # tasks per second started across every worker, with bursts of up to rateBurst, None for no limit
+    rateLimit = None
+    rateBurst = 1
+    # run periodically by the worker: seconds between runs or a cron expression, None when only run on demand
+    schedule = None
+
+    # failed tries are retried after retryDelay * retryBackoff ** (tries - 1) seconds, capped at maxRetryDelay and
+    # shortened by up to retryJitter of itself so tasks that failed together do not retry together
+    retryDelay = 300
+    retryBackoff = 2
+    maxRetryDelay = 60 * 60
+    retryJitter = 0.5
+    # errors that fail the task straight away instead of using up its remaining tries
+    nonRetryableErrors = (NonRetryableTaskError, ObjectDoesNotExist, Http404)
+
     def run(self, *args, **kwargs):
         """Override this method in subclasses."""
         raise NotImplementedError('Subclasses must implement run method')
 
+    def runBatch(self, dataList):
+        """Override this method in batchable subclasses."""
+        raise NotImplementedError('Batchable subclasses must implement runBatch method')
+
+    @property
+    def isAsync(self):
+        return inspect.iscoroutinefunction(self.run)
+
+    def runSync(self, data):
+        if self.isAsync:
+            return async_to_sync(self.run)(data)
+        return self.run(data)
+
+    def getSchedule(self):
+        return self.schedule
+
+    def isRetryable(self, error):
+        return not isinstance(error, self.nonRetryableErrors)
+
+    def getRetryDelay(self, tries):
+        delay = min(self.retryDelay * self.retryBackoff ** (tries - 1), self.maxRetryDelay)
+        return random.uniform(delay * (1 - self.retryJitter), delay)
+
     def execute(self, taskInstance):
         """Wrapper to update DB status and handle retries."""
 
-        taskInstance.status = Task.Status.RUNNING
-        taskInstance.tries += 1
-        taskInstance.startedAt = timezone.now()
-        taskInstance.save(update_fields=['status', 'tries', 'startedAt'])
+        # Tasks claimed by the worker are already RUNNING with this try counted.
+        if taskInstance.status != Task.Status.RUNNING:
+            taskInstance.status = Task.Status.RUNNING
+            taskInstance.tries += 1
+            taskInstance.startedAt = timezone.now()
+            taskInstance.leaseExpiresAt = taskInstance.startedAt + timedelta(seconds=settings.TASK_LEASE_SECONDS)
+            taskInstance.save(update_fields=['status', 'tries', 'startedAt', 'leaseExpiresAt'])
 
         try:
-            self.run(taskInstance.data)
-            taskInstance.status = Task.Status.COMPLETED
-            taskInstance.lastError = None
+            self.runSync(taskInstance.data)
+        except Exception as error:
+            return self.finish(taskInstance, error)
+        return self.finish(taskInstance)
 
-        except Exception:
+    async def executeAsync(self, taskInstance):
+        """execute for async handlers, cancelling a run that goes past the timeout."""
+        try:
+            await asyncio.wait_for(self.run(taskInstance.data), self.timeout)
+        except Exception as error:
+            return await sync_to_async(self.finishOnExecutor)(taskInstance, error)
+        return await sync_to_async(self.finishOnExecutor)(taskInstance)
 
-            taskInstance.lastError = traceback.format_exc()
+    def finishOnExecutor(self, taskInstance, error=None):
+        """finish from the executor thread of sync_to_async, which outlives the task and its connection."""
+        try:
+            return self.finish(taskInstance, error)
+        finally:
+            close_old_connections()
 
-            if taskInstance.tries >= taskInstance.maxTries:
+    def finish(self, taskInstance, error=None):
+        """Record the outcome of a RUNNING task and return it, 'superseded' if the lease was lost."""
+        retryDelay = None
+        if error is None:
+            taskInstance.status = Task.Status.COMPLETED
+            taskInstance.lastError = None
+        else:
+            taskInstance.lastError = ''.join(traceback.format_exception(error))
+            if taskInstance.tries >= taskInstance.maxTries or not self.isRetryable(error):
                 taskInstance.status = Task.Status.FAILED
             else:
                 taskInstance.status = Task.Status.PENDING
-                taskInstance.scheduledAt = timezone.now() + timedelta(minutes=5)
-        finally:
-            taskInstance.finishedAt = timezone.now()
-            taskInstance.save(update_fields=['status', 'tries', 'lastError', 'finishedAt'])
+                retryDelay = self.getRetryDelay(taskInstance.tries)
+
+        taskInstance.finishedAt = timezone.now()
+        taskInstance.leaseExpiresAt = None
+        outcome = {
+            'status': taskInstance.status,
+            'lastError': taskInstance.lastError,
+            'finishedAt': taskInstance.finishedAt,
+            'leaseExpiresAt': None,
+        }
+        if retryDelay is not None:
+            # scheduled against the database clock, so every worker agrees on when the retry is due
+            outcome['scheduledAt'] = Now() + timedelta(seconds=retryDelay)
+
+        # Only the worker still holding this try may record its outcome. If the lease expired and the task was handed
+        # out again, the newer try owns the row.
+        updated = Task.objects.filter(
+            id=taskInstance.id, status=Task.Status.RUNNING, tries=taskInstance.tries
+        ).update(**outcome)
+
+        if not updated:
+            return 'superseded'
+        if taskInstance.status == Task.Status.COMPLETED:
+            return 'completed'
+        return 'retried' if retryDelay is not None else 'failed'
+
+    def completeBatch(self, taskInstances):
+        """Record a whole batch as completed with one update."""
+        if not taskInstances:
+            return []
+
+        Task.objects.filter(
+            reduce(operator.or_, [Q(id=taskInstance.id, tries=taskInstance.tries) for taskInstance in taskInstances]),
+            status=Task.Status.RUNNING,
+        ).update(
+            status=Task.Status.COMPLETED,
+            lastError=None,
+            finishedAt=timezone.now(),
+            leaseExpiresAt=None,
+        )
+        return ['completed'] * len(taskInstances)
+
+    def executeBatch(self, taskInstances):
+        """Run claimed tasks together and return the outcome of each, as execute does."""
+        try:
+            self.runBatch([taskInstance.data for taskInstance in taskInstances])
+        except Exception:
+            return [self.execute(taskInstance) for taskInstance in taskInstances]
+        return self.completeBatch(taskInstances)
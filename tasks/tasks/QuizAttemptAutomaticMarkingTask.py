@@ -1,19 +1,40 @@
+from collections import defaultdict
+
 from django.shortcuts import get_object_or_404
 
 from core.models import QuizAttempt
-from onequiz.operations.generalOperations import QuizAttemptAutomaticMarking
+from onequiz.operations import bufferOperations
+from onequiz.operations.generalOperations import QuizAttemptAutomaticMarking, QuizAttemptBatchAutomaticMarking
 from tasks.tasks.BaseTask import BaseTask
 
 
 class QuizAttemptAutomaticMarkingTask(BaseTask):
+    batchable = True
+    lane = 'bulk'
 
     def run(self, *args, **kwargs):
+        if bufferOperations.isWriteBehindEnabled():
+            bufferOperations.flushAnswers(args[0].get('url'), wait=True)
+
         quizAttempt = get_object_or_404(QuizAttempt.objects.select_related('quiz', 'user'), url=args[0].get('url'))
-        responses = quizAttempt.responses.select_related('question').all()
+        if quizAttempt.status != QuizAttempt.Status.IN_REVIEW:
+            return
+
+        responses = quizAttempt.responses.all()
+        QuizAttemptAutomaticMarking(quizAttempt, responses).mark()
+
+    def runBatch(self, dataList):
+        urls = [data.get('url') for data in dataList]
+        if bufferOperations.isWriteBehindEnabled():
+            for url in urls:
+                bufferOperations.flushAnswers(url, wait=True)
 
-        quizAttemptAutomaticMarking = QuizAttemptAutomaticMarking(quizAttempt, responses)
-        marked = quizAttemptAutomaticMarking.mark()
+        quizAttemptsByQuiz = defaultdict(list)
+        quizAttempts = QuizAttempt.objects.select_related('quiz').filter(
+            url__in=urls, status=QuizAttempt.Status.IN_REVIEW
+        )
+        for quizAttempt in quizAttempts:
+            quizAttemptsByQuiz[quizAttempt.quiz].append(quizAttempt)
 
-        if marked:
-            quizAttempt.status = QuizAttempt.Status.MARKED
-            quizAttempt.save(update_fields=['status'])
+        for quiz, quizAttempts in quizAttemptsByQuiz.items():
+            QuizAttemptBatchAutomaticMarking(quiz, quizAttempts).mark()
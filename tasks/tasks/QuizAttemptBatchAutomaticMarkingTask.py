@@ -0,0 +1,19 @@
+from core.models import Quiz, QuizAttempt
+from onequiz.operations import bufferOperations
+from onequiz.operations.generalOperations import QuizAttemptBatchAutomaticMarking
+from tasks.tasks.BaseTask import BaseTask
+
+
+class QuizAttemptBatchAutomaticMarkingTask(BaseTask):
+    timeout = 600
+    lane = 'bulk'
+
+    def run(self, *args, **kwargs):
+        urls = args[0].get('urls')
+        if bufferOperations.isWriteBehindEnabled():
+            for url in urls:
+                bufferOperations.flushAnswers(url, wait=True)
+
+        quiz = Quiz.objects.get(id=args[0].get('quizId'))
+        quizAttempts = QuizAttempt.objects.filter(quiz=quiz, url__in=urls, status=QuizAttempt.Status.IN_REVIEW)
+        QuizAttemptBatchAutomaticMarking(quiz, quizAttempts).mark()
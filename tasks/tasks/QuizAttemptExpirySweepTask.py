@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import QuizAttempt
+from onequiz.operations.quizAttemptOperations import submitExpiredQuizAttempts
+from tasks.tasks.BaseTask import BaseTask
+
+
+class QuizAttemptExpirySweepTask(BaseTask):
+    concurrency = 1
+    schedule = settings.QUIZ_ATTEMPT_EXPIRY_SWEEP_INTERVAL
+    BATCH_SIZE = 500
+
+    def run(self, *args, **kwargs):
+        while self.sweep() == self.BATCH_SIZE:
+            pass
+
+    def sweep(self):
+        """Submit one batch of expired attempts and return how many were found."""
+        with transaction.atomic():
+            expiredIds = list(
+                QuizAttempt.objects.select_for_update(skip_locked=True)
+                .filter(status__in=[QuizAttempt.Status.NOT_ATTEMPTED, QuizAttempt.Status.IN_PROGRESS],
+                        deadline__lte=timezone.now())
+                .order_by('deadline')
+                .values_list('id', flat=True)[:self.BATCH_SIZE]
+            )
+            submitExpiredQuizAttempts(expiredIds)
+        return len(expiredIds)
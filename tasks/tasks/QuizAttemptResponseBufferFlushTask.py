@@ -0,0 +1,16 @@
+from django.conf import settings
+
+from onequiz.operations import bufferOperations
+from tasks.tasks.BaseTask import BaseTask
+
+
+class QuizAttemptResponseBufferFlushTask(BaseTask):
+    concurrency = 1
+
+    def getSchedule(self):
+        if not bufferOperations.isWriteBehindEnabled():
+            return None
+        return settings.QUIZ_ATTEMPT_BUFFER_FLUSH_INTERVAL
+
+    def run(self, *args, **kwargs):
+        bufferOperations.flushAllAnswers()
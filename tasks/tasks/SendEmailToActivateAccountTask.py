@@ -6,17 +6,17 @@ from django.urls import reverse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
-from tasks.tasks.BaseTask import BaseTask
+from tasks.tasks.BaseEmailTask import BaseEmailTask
 
 
-class SendEmailToActivateAccountTask(BaseTask):
+class SendEmailToActivateAccountTask(BaseEmailTask):
 
-    def run(self, *args, **kwargs):
+    def buildMessage(self, data):
         emailSubject = 'Activate your OneQuiz Account'
 
-        user = User.objects.get(id=args[0].get('user'))
+        user = User.objects.get(id=data.get('user'))
         fullName = user.get_full_name()
-        domain = args[0].get('domain')
+        domain = data.get('domain')
 
         uid = urlsafe_base64_encode(force_bytes(user.pk))
         prtg = PasswordResetTokenGenerator()
@@ -35,5 +35,4 @@ class SendEmailToActivateAccountTask(BaseTask):
             The OneQuiz Team
         """.format(fullName, domain, url)
 
-        emailMessage = EmailMessage(emailSubject, message, settings.EMAIL_HOST_USER, [user.email])
-        emailMessage.send()
+        return EmailMessage(emailSubject, message, settings.EMAIL_HOST_USER, [user.email])
@@ -6,17 +6,17 @@ from django.urls import reverse
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
-from tasks.tasks.BaseTask import BaseTask
+from tasks.tasks.BaseEmailTask import BaseEmailTask
 
 
-class SendEmailToResetPasswordTask(BaseTask):
+class SendEmailToResetPasswordTask(BaseEmailTask):
 
-    def run(self, *args, **kwargs):
+    def buildMessage(self, data):
         emailSubject = 'Request to change OneTutor Password'
 
-        user = User.objects.get(id=args[0].get('user'))
+        user = User.objects.get(id=data.get('user'))
         fullName = user.get_full_name()
-        domain = args[0].get('domain')
+        domain = data.get('domain')
 
         uid = urlsafe_base64_encode(force_bytes(user.pk))
         prtg = PasswordResetTokenGenerator()
@@ -34,5 +34,4 @@ class SendEmailToResetPasswordTask(BaseTask):
             The OneQuiz Team
         """.format(fullName, domain, url)
 
-        emailMessage = EmailMessage(emailSubject, message, settings.EMAIL_HOST_USER, [user.email])
-        emailMessage.send()
+        return EmailMessage(emailSubject, message, settings.EMAIL_HOST_USER, [user.email])
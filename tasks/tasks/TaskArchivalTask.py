@@ -0,0 +1,18 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.tasks.BaseTask import BaseTask
+
+
+class TaskArchivalTask(BaseTask):
+    concurrency = 1
+    schedule = settings.TASK_ARCHIVE_SCHEDULE or None
+    BATCH_SIZE = 1000
+
+    def run(self, *args, **kwargs):
+        finishedBefore = timezone.now() - timedelta(days=settings.TASK_ARCHIVE_AFTER_DAYS)
+        while Task.objects.archiveBatch(finishedBefore, self.BATCH_SIZE):
+            pass
@@ -0,0 +1,61 @@
+import asyncio
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from tasks import registry
+from tasks.models import Task
+from tasks.tasks.BaseTask import BaseTask
+
+TASK_NAME = 'AsyncTestTask'
+
+
+class AsyncTestTask(BaseTask):
+    timeout = 0.5
+
+    async def run(self, data):
+        if data.get('fail'):
+            raise OSError('connection reset')
+        await asyncio.sleep(data.get('sleep', 0))
+
+
+class AsyncTasksTest(TransactionTestCase):
+    # the event loop finishes tasks from threads of its own, which only see committed rows
+
+    def setUp(self) -> None:
+        registry.getTaskHandlers()
+        taskHandlersPatcher = patch.dict(registry.taskHandlers, {TASK_NAME: AsyncTestTask()})
+        taskHandlersPatcher.start()
+        self.addCleanup(taskHandlersPatcher.stop)
+
+    def testCoroutineHandlerRunsThroughTheWorker(self):
+        completedTask = Task.objects.create(name=TASK_NAME, data={})
+        retriedTask = Task.objects.create(name=TASK_NAME, data={'fail': True})
+        timedOutTask = Task.objects.create(name=TASK_NAME, data={'sleep': 10})
+
+        call_command('tasks', '--once', stdout=StringIO(), stderr=StringIO())
+
+        completedTask.refresh_from_db()
+        self.assertEqual(completedTask.status, Task.Status.COMPLETED)
+
+        retriedTask.refresh_from_db()
+        self.assertEqual(retriedTask.status, Task.Status.PENDING)
+        self.assertEqual(retriedTask.tries, 1)
+        self.assertIn('connection reset', retriedTask.lastError)
+
+        # cancelled at the timeout rather than left running, and retried like any other failure
+        timedOutTask.refresh_from_db()
+        self.assertEqual(timedOutTask.status, Task.Status.PENDING)
+        self.assertIn('TimeoutError', timedOutTask.lastError)
+
+    def testExecutorThreadClosesItsConnectionAfterFinishing(self):
+        task = Task.objects.create(name=TASK_NAME, data={})
+
+        with patch('tasks.tasks.BaseTask.close_old_connections') as mockCloseOldConnections:
+            call_command('tasks', '--once', stdout=StringIO(), stderr=StringIO())
+
+        mockCloseOldConnections.assert_called_once()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.COMPLETED)
@@ -0,0 +1,47 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from onequiz.operations import bakerOperations
+from onequiz.tests.BaseTest import BaseTest
+from tasks.models import Task
+from tasks.registry import getTaskHandler
+
+TASK_NAME = 'SendEmailToActivateAccountTask'
+
+
+class EmailTasksTest(BaseTest):
+
+    def testBatchReturnsOneOutcomePerClaimedTaskInOrder(self):
+        for userId in [self.user.id, 0, self.user.id]:
+            Task.objects.create(name=TASK_NAME, data={'user': userId, 'domain': 'testserver'})
+        Task.objects.create(name=TASK_NAME, data={'user': self.user.id, 'domain': 'testserver'})
+        claimedTasks = Task.objects.claim(3)
+
+        outcomes = getTaskHandler(TASK_NAME).executeBatch(claimedTasks)
+
+        self.assertEqual(outcomes, ['completed', 'failed', 'completed'])
+        self.assertEqual(len(mail.outbox), 2)
+        # Only the claimed tasks are sent, the next ones are left for the worker to claim
+        self.assertEqual(Task.objects.filter(status=Task.Status.PENDING).count(), 1)
+
+
+class EmailBatchWorkerTest(TransactionTestCase):
+    # tasks run on pool threads of their own, which only see committed rows
+
+    @patch('tasks.tasks.BaseEmailTask.get_connection', wraps=get_connection)
+    def testQueuedEmailsShareOneConnection(self, mockGetConnection):
+        user = bakerOperations.createUser()
+        for _ in range(12):
+            Task.objects.create(name=TASK_NAME, data={'user': user.id, 'domain': 'testserver'})
+
+        # more emails than a single claim of the worker takes
+        call_command('tasks', '--once', '--batch-size', '5', stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(mockGetConnection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 12)
+        self.assertEqual(Task.objects.filter(status=Task.Status.COMPLETED).count(), 12)
@@ -0,0 +1,76 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from onequiz.tests.BaseTest import BaseTest
+from tasks.models import Task, TaskArchive
+
+TASK_NAME = 'QuizAttemptAutomaticMarkingTask'
+
+
+class TaskArchiveTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(TaskArchiveTest, self).setUp('')
+        longAgo = timezone.now() - timedelta(days=30)
+        self.completedTask = Task.objects.create(
+            name=TASK_NAME, data={'url': 'completed'}, status=Task.Status.COMPLETED, tries=1, finishedAt=longAgo
+        )
+        self.failedTask = Task.objects.create(
+            name=TASK_NAME, data={'url': 'failed'}, status=Task.Status.FAILED, tries=3, finishedAt=longAgo,
+            lastError='Traceback'
+        )
+        self.recentTask = Task.objects.create(
+            name=TASK_NAME, status=Task.Status.COMPLETED, tries=1, finishedAt=timezone.now()
+        )
+        self.pendingTask = Task.objects.create(name=TASK_NAME, finishedAt=longAgo)
+        self.runningTask = Task.objects.create(name=TASK_NAME, status=Task.Status.RUNNING, finishedAt=longAgo)
+        self.finishedBefore = timezone.now() - timedelta(days=7)
+
+    def assertOnlyOldFinishedTasksMoved(self):
+        self.assertCountEqual(
+            Task.objects.values_list('id', flat=True), [self.recentTask.id, self.pendingTask.id, self.runningTask.id]
+        )
+
+    def testOldFinishedTasksAreMovedToTheArchiveTable(self):
+        self.assertEqual(Task.objects.archiveBatch(self.finishedBefore, 10), 2)
+        self.assertEqual(Task.objects.archiveBatch(self.finishedBefore, 10), 0)
+
+        self.assertOnlyOldFinishedTasksMoved()
+        archivedFailedTask = TaskArchive.objects.get(taskId=self.failedTask.id)
+        self.assertEqual(archivedFailedTask.name, TASK_NAME)
+        self.assertEqual(archivedFailedTask.data, {'url': 'failed'})
+        self.assertEqual(archivedFailedTask.status, Task.Status.FAILED)
+        self.assertEqual(archivedFailedTask.tries, 3)
+        self.assertEqual(archivedFailedTask.lastError, 'Traceback')
+        self.assertEqual(archivedFailedTask.finishedAt, self.failedTask.finishedAt)
+        self.assertTrue(TaskArchive.objects.filter(taskId=self.completedTask.id).exists())
+
+    def testArchiveBatchMovesAtMostBatchSizeTasks(self):
+        self.assertEqual(Task.objects.archiveBatch(self.finishedBefore, 1), 1)
+        self.assertEqual(TaskArchive.objects.count(), 1)
+        self.assertEqual(Task.objects.count(), 4)
+
+    def testOldFinishedTasksAreExportedAsGzippedJsonLines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'tasks.jsonl.gz')
+            call_command('archivetasks', '--days', '7', '--batch-size', '1', '--output', output, stdout=StringIO())
+
+            with gzip.open(output, 'rt', encoding='utf-8') as file:
+                archivedTasks = {task['taskId']: task for task in map(json.loads, file)}
+
+        self.assertOnlyOldFinishedTasksMoved()
+        self.assertFalse(TaskArchive.objects.exists())
+        self.assertCountEqual(archivedTasks, [self.completedTask.id, self.failedTask.id])
+        archivedFailedTask = archivedTasks[self.failedTask.id]
+        self.assertEqual(archivedFailedTask['data'], {'url': 'failed'})
+        self.assertEqual(archivedFailedTask['status'], Task.Status.FAILED)
+        self.assertEqual(archivedFailedTask['lastError'], 'Traceback')
+        self.assertEqual(parse_datetime(archivedFailedTask['finishedAt']), self.failedTask.finishedAt)
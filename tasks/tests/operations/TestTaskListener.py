@@ -0,0 +1,75 @@
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from onequiz.operations import taskOperations
+from onequiz.operations.taskOperations import TASK_CHANNEL, TaskListener, notifyTaskWorkers
+from onequiz.tests.BaseTest import BaseTest
+from tasks.models import Task
+
+TASK_NAME = 'QuizAttemptAutomaticMarkingTask'
+
+
+class TaskListenerTest(BaseTest):
+
+    @patch.object(taskOperations, 'notifyTaskWorkers')
+    def testWorkersAreNotifiedOnceTheEnqueueCommits(self, mockNotifyTaskWorkers):
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.enqueue(TASK_NAME, {})
+            mockNotifyTaskWorkers.assert_not_called()
+
+        mockNotifyTaskWorkers.assert_called_once()
+
+    @patch.object(taskOperations, 'notifyTaskWorkers')
+    def testRolledBackEnqueueNotifiesNoOne(self, mockNotifyTaskWorkers):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Task.objects.enqueue(TASK_NAME, {})
+                raise RuntimeError
+
+        mockNotifyTaskWorkers.assert_not_called()
+
+    @patch.object(taskOperations, 'isListenSupported', return_value=True)
+    def testNotifySendsToTheTaskChannel(self, mockIsListenSupported):
+        with patch.object(connection, 'cursor') as mockCursor:
+            notifyTaskWorkers()
+
+        mockCursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+            'SELECT pg_notify(%s, %s)', [TASK_CHANNEL, '']
+        )
+
+    @patch.object(taskOperations, 'isListenSupported', return_value=False)
+    @patch.object(taskOperations.time, 'sleep')
+    def testListenerPollsWithoutPostgres(self, mockSleep, mockIsListenSupported):
+        listener = TaskListener()
+
+        self.assertFalse(listener.wait(3))
+        mockSleep.assert_called_once_with(3)
+        self.assertIsNone(listener.listenConnection)
+
+    @patch.object(taskOperations, 'isListenSupported', return_value=True)
+    @patch.object(taskOperations.time, 'sleep')
+    def testListenerPollsWhileItsConnectionIsDown(self, mockSleep, mockIsListenSupported):
+        listener = TaskListener()
+
+        with patch.object(listener, 'connect', side_effect=OSError('connection refused')):
+            self.assertFalse(listener.wait(3))
+        mockSleep.assert_called_once_with(3)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'LISTEN needs PostgreSQL')
+class TaskListenerNotifyTest(TransactionTestCase):
+
+    def testListenerIsWokenUpByAnEnqueue(self):
+        listener = TaskListener()
+        self.addCleanup(listener.close)
+        listener.connect()
+
+        thread = threading.Thread(target=lambda: (Task.objects.enqueue(TASK_NAME, {}), connection.close()))
+        thread.start()
+        thread.join()
+
+        self.assertTrue(listener.wait(5))
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from onequiz.tests.BaseTest import BaseTest
+from tasks.metrics import Histogram, TaskMetrics
+from tasks.models import Task
+
+TASK_NAME = 'QuizAttemptAutomaticMarkingTask'
+OTHER_TASK_NAME = 'TaskArchivalTask'
+
+
+class TaskMetricsTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(TaskMetricsTest, self).setUp('')
+        self.metrics = TaskMetrics()
+
+    def recordRun(self, name, waitSeconds, runSeconds, outcome):
+        scheduledAt = timezone.now()
+        task = Task(name=name, scheduledAt=scheduledAt, startedAt=scheduledAt + timedelta(seconds=waitSeconds))
+        self.metrics.recordRun(task, runSeconds, outcome)
+
+    def testHistogramCountsEachValueInTheFirstBucketItFits(self):
+        histogram = Histogram((1, 5))
+        for value in [0.5, 1, 3, 10]:
+            histogram.observe(value)
+
+        self.assertEqual(list(histogram.cumulativeCounts()), [(1, 2), (5, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.sum, 14.5)
+        self.assertEqual(histogram.count, 4)
+
+    def testRunsAreCountedPerTaskNameAndOutcome(self):
+        self.recordRun(TASK_NAME, 2, 0.02, 'completed')
+        self.recordRun(TASK_NAME, 2, 0.5, 'retried')
+        self.recordRun(TASK_NAME, 2, 0.02, 'completed')
+        self.recordRun(OTHER_TASK_NAME, 0, 40, 'failed')
+        self.metrics.recordOutcome(TASK_NAME, 'throttled', 3)
+
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn(f'onequiz_tasks_total{{name="{TASK_NAME}",outcome="completed"}} 2', lines)
+        self.assertIn(f'onequiz_tasks_total{{name="{TASK_NAME}",outcome="retried"}} 1', lines)
+        self.assertIn(f'onequiz_tasks_total{{name="{TASK_NAME}",outcome="throttled"}} 3', lines)
+        self.assertIn(f'onequiz_tasks_total{{name="{OTHER_TASK_NAME}",outcome="failed"}} 1', lines)
+        self.assertIn(f'onequiz_task_run_seconds_bucket{{name="{TASK_NAME}",le="0.05"}} 2', lines)
+        self.assertIn(f'onequiz_task_run_seconds_bucket{{name="{TASK_NAME}",le="0.5"}} 3', lines)
+        self.assertIn(f'onequiz_task_run_seconds_bucket{{name="{OTHER_TASK_NAME}",le="30"}} 0', lines)
+        self.assertIn(f'onequiz_task_run_seconds_bucket{{name="{OTHER_TASK_NAME}",le="60"}} 1', lines)
+        self.assertIn(f'onequiz_task_run_seconds_count{{name="{TASK_NAME}"}} 3', lines)
+        self.assertIn(f'onequiz_task_run_seconds_sum{{name="{TASK_NAME}"}} 0.540000', lines)
+        self.assertIn(f'onequiz_task_wait_seconds_bucket{{name="{TASK_NAME}",le="1"}} 0', lines)
+        self.assertIn(f'onequiz_task_wait_seconds_bucket{{name="{TASK_NAME}",le="+Inf"}} 3', lines)
+
+    def testQueueDepthIsRenderedPerTaskNameAndStatus(self):
+        Task.objects.create(name=TASK_NAME, scheduledAt=timezone.now() - timedelta(minutes=1))
+        Task.objects.create(name=TASK_NAME)
+        Task.objects.create(name=TASK_NAME, status=Task.Status.RUNNING)
+        Task.objects.create(name=OTHER_TASK_NAME, status=Task.Status.COMPLETED)
+
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn('# TYPE onequiz_task_queue_depth gauge', lines)
+        self.assertIn(f'onequiz_task_queue_depth{{name="{TASK_NAME}",status="PENDING"}} 2', lines)
+        self.assertIn(f'onequiz_task_queue_depth{{name="{TASK_NAME}",status="RUNNING"}} 1', lines)
+        self.assertFalse(any(line.startswith(f'onequiz_task_queue_depth{{name="{OTHER_TASK_NAME}"') for line in lines))
+        oldestDue = next(line for line in lines if line.startswith('onequiz_task_oldest_due_seconds{'))
+        self.assertTrue(oldestDue.startswith(f'onequiz_task_oldest_due_seconds{{name="{TASK_NAME}"}} '))
+        self.assertGreaterEqual(float(oldestDue.split()[-1]), 60)
+
+    def testLabelValuesAreEscaped(self):
+        self.metrics.recordOutcome('Task "quoted"\\with\nnewline', 'failed')
+
+        self.assertIn(
+            'onequiz_tasks_total{name="Task \\"quoted\\"\\\\with\\nnewline",outcome="failed"} 1',
+            self.metrics.render().splitlines(),
+        )
@@ -0,0 +1,160 @@
+import threading
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from onequiz.tests.BaseTest import BaseTest
+from tasks.models import LEASE_EXPIRED_ERROR, Task
+from tasks.registry import getTaskHandler
+from tasks.tasks.BaseTask import BaseTask, NonRetryableTaskError
+
+TASK_NAME = 'QuizAttemptAutomaticMarkingTask'
+
+
+class TaskQueueTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(TaskQueueTest, self).setUp('')
+        self.handler = getTaskHandler(TASK_NAME)
+
+    def testClaimMovesDueTasksToRunningInPriorityOrder(self):
+        laterTask = Task.objects.create(name=TASK_NAME, priority=1)
+        firstTask = Task.objects.create(name=TASK_NAME, priority=0)
+        Task.objects.create(name=TASK_NAME, scheduledAt=timezone.now() + timedelta(hours=1))
+
+        claimedTasks = Task.objects.claim(10)
+
+        self.assertEqual(claimedTasks, [firstTask, laterTask])
+        for task in claimedTasks:
+            self.assertEqual(task.status, Task.Status.RUNNING)
+            self.assertEqual(task.tries, 1)
+            self.assertGreater(task.leaseExpiresAt, timezone.now())
+        self.assertEqual(Task.objects.claim(10), [])
+
+    def testClaimIsLimitedToNamesAndLanes(self):
+        task = Task.objects.create(name=TASK_NAME)
+        Task.objects.create(name='TaskArchivalTask')
+
+        self.assertEqual(Task.objects.claim(10, names=[TASK_NAME], lanes=[self.handler.lane]), [task])
+        self.assertEqual(Task.objects.claim(10, lanes=['no-such-lane']), [])
+
+    def testEnqueueWithDedupKeyReturnsTheActiveTask(self):
+        task, created = Task.objects.enqueue(TASK_NAME, {}, 'key', scheduledAt=timezone.now() + timedelta(hours=1))
+        self.assertTrue(created)
+
+        duplicateTask, created = Task.objects.enqueue(TASK_NAME, {}, 'key')
+        self.assertFalse(created)
+        self.assertEqual(duplicateTask, task)
+        self.assertLessEqual(Task.objects.get(id=task.id).scheduledAt, timezone.now())
+        self.assertEqual(Task.objects.count(), 1)
+
+        Task.objects.filter(id=task.id).update(status=Task.Status.COMPLETED)
+        newTask, created = Task.objects.enqueue(TASK_NAME, {}, 'key')
+        self.assertTrue(created)
+        self.assertNotEqual(newTask, task)
+
+    def testEnqueueManySkipsTasksWhoseDedupKeyIsHeld(self):
+        Task.objects.enqueue(TASK_NAME, {}, 'held')
+
+        Task.objects.enqueueMany(
+            Task.objects.buildTask(TASK_NAME, {}, dedupKey) for dedupKey in ['held', 'free']
+        )
+
+        self.assertEqual(
+            sorted(Task.objects.values_list('dedupKey', flat=True)), [f'{TASK_NAME}:free', f'{TASK_NAME}:held']
+        )
+
+    def testExpiredLeasesAreRequeuedOrFailed(self):
+        expired = timezone.now() - timedelta(seconds=1)
+        requeuedTask = Task.objects.create(name=TASK_NAME, status=Task.Status.RUNNING, tries=1, leaseExpiresAt=expired)
+        failedTask = Task.objects.create(name=TASK_NAME, status=Task.Status.RUNNING, tries=3, leaseExpiresAt=expired)
+        runningTask = Task.objects.create(
+            name=TASK_NAME, status=Task.Status.RUNNING, tries=1, leaseExpiresAt=timezone.now() + timedelta(minutes=1)
+        )
+
+        self.assertEqual(Task.objects.reapExpiredLeases(), (1, 1))
+
+        requeuedTask.refresh_from_db()
+        failedTask.refresh_from_db()
+        runningTask.refresh_from_db()
+        self.assertEqual(requeuedTask.status, Task.Status.PENDING)
+        self.assertEqual(requeuedTask.lastError, LEASE_EXPIRED_ERROR)
+        self.assertEqual(failedTask.status, Task.Status.FAILED)
+        self.assertEqual(runningTask.status, Task.Status.RUNNING)
+
+    def testRetryDelayBacksOffWithinJitter(self):
+        class RetryTask(BaseTask):
+            retryDelay = 10
+            retryBackoff = 2
+            maxRetryDelay = 60
+            retryJitter = 0.5
+
+        handler = RetryTask()
+        for tries, delay in [(1, 10), (2, 20), (3, 40), (4, 60), (10, 60)]:
+            for _ in range(50):
+                self.assertTrue(delay * 0.5 <= handler.getRetryDelay(tries) <= delay)
+
+    def testRetryableErrorReschedulesTheTask(self):
+        Task.objects.create(name=TASK_NAME, data={})
+        task = Task.objects.claim(1)[0]
+
+        with patch.object(self.handler, 'run', side_effect=OSError('connection reset')):
+            self.assertEqual(self.handler.execute(task), 'retried')
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.PENDING)
+        self.assertGreater(task.scheduledAt, timezone.now())
+        self.assertIn('connection reset', task.lastError)
+
+    def testNonRetryableErrorFailsOnTheFirstTry(self):
+        Task.objects.create(name=TASK_NAME, data={})
+        task = Task.objects.claim(1)[0]
+
+        with patch.object(self.handler, 'run', side_effect=NonRetryableTaskError('bad data')):
+            self.assertEqual(self.handler.execute(task), 'failed')
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.FAILED)
+        self.assertEqual(task.tries, 1)
+
+    def testOutcomeOfAnExpiredTryIsIgnored(self):
+        Task.objects.create(name=TASK_NAME, data={})
+        staleTask = Task.objects.claim(1)[0]
+        Task.objects.filter(id=staleTask.id).update(leaseExpiresAt=timezone.now() - timedelta(seconds=1))
+        Task.objects.reapExpiredLeases()
+        Task.objects.claim(1)
+
+        self.assertEqual(self.handler.finish(staleTask), 'superseded')
+        self.assertEqual(Task.objects.get(id=staleTask.id).status, Task.Status.RUNNING)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SKIP LOCKED needs PostgreSQL')
+class TaskClaimSkipLockedTest(TransactionTestCase):
+
+    def testClaimSkipsTasksLockedByAnotherWorker(self):
+        lockedTask = Task.objects.create(name=TASK_NAME)
+        freeTask = Task.objects.create(name=TASK_NAME)
+        isLocked = threading.Event()
+        release = threading.Event()
+
+        def holdLock():
+            try:
+                with transaction.atomic():
+                    list(Task.objects.select_for_update().filter(id=lockedTask.id))
+                    isLocked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=holdLock)
+        thread.start()
+        isLocked.wait(10)
+        try:
+            self.assertEqual(Task.objects.claim(10), [freeTask])
+        finally:
+            release.set()
+            thread.join()
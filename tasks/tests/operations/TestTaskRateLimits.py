@@ -0,0 +1,101 @@
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import fakeredis
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from onequiz.operations import rateLimitOperations, redisOperations
+from onequiz.operations.rateLimitOperations import takeTokens
+from onequiz.tests.BaseTest import BaseTest
+from tasks import registry
+from tasks.management.commands.tasks import Command
+from tasks.models import Task
+from tasks.tasks.BaseTask import BaseTask
+
+TASK_NAME = 'RateLimitedTestTask'
+
+
+class RateLimitedTestTask(BaseTask):
+    rateLimit = 1
+    rateBurst = 2
+
+    def run(self, data):
+        pass
+
+
+class BulkTestTask(BaseTask):
+    lane = 'bulk'
+
+    def run(self, data):
+        pass
+
+
+def patchTaskHandlers(testCase):
+    registry.getTaskHandlers()
+    taskHandlersPatcher = patch.dict(registry.taskHandlers, {
+        TASK_NAME: RateLimitedTestTask(),
+        'BulkTestTask': BulkTestTask(),
+    })
+    taskHandlersPatcher.start()
+    testCase.addCleanup(taskHandlersPatcher.stop)
+
+
+class TaskRateLimitsTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(TaskRateLimitsTest, self).setUp('')
+        patchTaskHandlers(self)
+        for patcher in [
+            patch.object(redisOperations, 'redisClient', fakeredis.FakeRedis(decode_responses=True)),
+            patch.object(rateLimitOperations, 'takeTokensScript', None),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def testBucketGrantsUpToItsBurst(self):
+        self.assertEqual(takeTokens(TASK_NAME, 5, 1, 3), 3)
+        self.assertEqual(takeTokens(TASK_NAME, 1, 1, 3), 0)
+        self.assertEqual(takeTokens('OtherTask', 1, 1, 3), 1)
+
+    def testBucketRefillsAtItsRate(self):
+        self.assertEqual(takeTokens(TASK_NAME, 2, 20, 2), 2)
+        self.assertEqual(takeTokens(TASK_NAME, 2, 20, 2), 0)
+
+        time.sleep(0.11)
+
+        self.assertEqual(takeTokens(TASK_NAME, 2, 20, 2), 2)
+
+    def testTasksOverTheRateLimitAreReleasedWithoutUsingUpATry(self):
+        for _ in range(3):
+            Task.objects.create(name=TASK_NAME)
+        command = Command(stderr=StringIO())
+        command.handlers = registry.taskHandlers
+        command.throttledUntil = {}
+
+        allowedTasks = command._applyRateLimits(Task.objects.claim(10))
+
+        self.assertEqual(len(allowedTasks), 2)
+        releasedTask = Task.objects.exclude(id__in=[task.id for task in allowedTasks]).get()
+        self.assertEqual(releasedTask.status, Task.Status.PENDING)
+        self.assertEqual(releasedTask.tries, 0)
+        self.assertGreater(releasedTask.scheduledAt, timezone.now())
+        self.assertEqual(command._getThrottledNames(), [TASK_NAME])
+
+
+class TaskLanesTest(TransactionTestCase):
+    # tasks run on pool threads of their own, which only see committed rows
+
+    def setUp(self) -> None:
+        patchTaskHandlers(self)
+
+    def testWorkerOnlyClaimsTasksOfItsLanes(self):
+        bulkTask = Task.objects.create(name='BulkTestTask')
+        otherTask = Task.objects.create(name='TaskArchivalTask')
+
+        call_command('tasks', '--once', '--lanes', 'bulk=1', stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(Task.objects.get(id=bulkTask.id).status, Task.Status.COMPLETED)
+        self.assertEqual(Task.objects.get(id=otherTask.id).status, Task.Status.PENDING)
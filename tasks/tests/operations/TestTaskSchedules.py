@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from django.utils import timezone
+from parameterized import parameterized
+
+from onequiz.tests.BaseTest import BaseTest
+from tasks.models import Task, TaskSchedule
+from tasks.schedules import CronSchedule, IntervalSchedule, parseSchedule
+
+TASK_NAME = 'TaskArchivalTask'
+
+
+def at(*args):
+    return timezone.make_aware(datetime(*args))
+
+
+class CronScheduleTest(BaseTest):
+
+    @parameterized.expand([
+        ('every quarter hour', '*/15 * * * *', at(2026, 1, 1, 10, 7), at(2026, 1, 1, 10, 15)),
+        ('stepped from an offset', '5/20 * * * *', at(2026, 1, 1, 10, 30), at(2026, 1, 1, 10, 45)),
+        ('stepped range', '0 9-17/4 * * *', at(2026, 1, 1, 10, 0), at(2026, 1, 1, 13, 0)),
+        ('strictly after a match', '30 3 * * *', at(2026, 1, 1, 3, 30), at(2026, 1, 2, 3, 30)),
+        ('list of days', '0 0 1,15 * *', at(2026, 1, 2, 0, 0), at(2026, 1, 15, 0, 0)),
+        ('day of week only', '0 8 * * 1', at(2026, 1, 1, 0, 0), at(2026, 1, 5, 8, 0)),
+        ('7 is sunday', '0 8 * * 7', at(2026, 1, 1, 0, 0), at(2026, 1, 4, 8, 0)),
+        ('day of week matches first', '0 0 13 * 5', at(2026, 1, 1, 0, 0), at(2026, 1, 2, 0, 0)),
+        ('day of month matches first', '0 0 13 * 5', at(2026, 1, 10, 0, 0), at(2026, 1, 13, 0, 0)),
+        ('month rollover', '0 0 1 * *', at(2026, 12, 15, 0, 0), at(2027, 1, 1, 0, 0)),
+        ('february 29', '0 0 29 2 *', at(2026, 1, 1, 0, 0), at(2028, 2, 29, 0, 0)),
+    ])
+    def testNextRunAt(self, _, expression, after, expected):
+        self.assertEqual(CronSchedule(expression).getNextRunAt(after), expected)
+
+    @parameterized.expand([
+        ('too few fields', '0 * * *'),
+        ('minute out of range', '60 * * * *'),
+        ('hour out of range', '0 24 * * *'),
+        ('day zero', '0 0 0 * *'),
+        ('reversed range', '5-1 * * * *'),
+        ('zero step', '*/0 * * * *'),
+        ('not a number', 'a * * * *'),
+    ])
+    def testInvalidExpressionIsRejected(self, _, expression):
+        with self.assertRaises(ValueError):
+            CronSchedule(expression)
+
+    def testExpressionThatNeverMatchesIsRejected(self):
+        with self.assertRaises(ValueError):
+            CronSchedule('0 0 31 2 *').getNextRunAt(at(2026, 1, 1, 0, 0))
+
+    def testParseSchedule(self):
+        self.assertIsInstance(parseSchedule(60), IntervalSchedule)
+        self.assertIsInstance(parseSchedule('0 * * * *'), CronSchedule)
+
+
+class TaskScheduleTest(BaseTest):
+
+    def setUp(self, path=None) -> None:
+        super(TaskScheduleTest, self).setUp('')
+        self.schedules = {TASK_NAME: IntervalSchedule(60)}
+
+    def makeDue(self):
+        TaskSchedule.objects.filter(name=TASK_NAME).update(nextRunAt=timezone.now() - timedelta(minutes=5))
+
+    def testFirstSightOfAScheduleOnlyPlansItsFirstRun(self):
+        self.assertEqual(TaskSchedule.objects.enqueueDue(self.schedules), [])
+
+        self.assertGreater(TaskSchedule.objects.get(name=TASK_NAME).nextRunAt, timezone.now())
+        self.assertFalse(Task.objects.exists())
+
+    def testDueScheduleIsEnqueuedOncePerTick(self):
+        TaskSchedule.objects.enqueueDue(self.schedules)
+        self.makeDue()
+
+        self.assertEqual(TaskSchedule.objects.enqueueDue(self.schedules), [TASK_NAME])
+        self.assertEqual(TaskSchedule.objects.enqueueDue(self.schedules), [])
+
+        self.assertEqual(Task.objects.filter(name=TASK_NAME).count(), 1)
+        self.assertGreater(TaskSchedule.objects.get(name=TASK_NAME).nextRunAt, timezone.now())
+
+    def testTickWhileThePreviousRunIsPendingIsAbsorbed(self):
+        TaskSchedule.objects.enqueueDue(self.schedules)
+        self.makeDue()
+        TaskSchedule.objects.enqueueDue(self.schedules)
+        self.makeDue()
+
+        self.assertEqual(TaskSchedule.objects.enqueueDue(self.schedules), [TASK_NAME])
+        self.assertEqual(Task.objects.filter(name=TASK_NAME).count(), 1)
+
+    @patch('tasks.models.tryAdvisoryLock', return_value=False)
+    def testOnlyTheSchedulerLockHolderEnqueues(self, mockTryAdvisoryLock):
+        TaskSchedule.objects.create(name=TASK_NAME, nextRunAt=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(TaskSchedule.objects.enqueueDue(self.schedules), [])
+        self.assertFalse(Task.objects.exists())
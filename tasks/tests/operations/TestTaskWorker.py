@@ -0,0 +1,122 @@
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from tasks import registry
+from tasks.management.commands.tasks import Command
+from tasks.models import Task
+from tasks.tasks.BaseTask import BaseTask
+
+TASK_NAME = 'SlowTestTask'
+
+
+class SlowTestTask(BaseTask):
+
+    def run(self, data):
+        time.sleep(data.get('sleep', 0))
+
+
+class LimitedTestTask(SlowTestTask):
+    concurrency = 1
+    timeout = 0.4
+
+
+class TimedTestTask(SlowTestTask):
+    timeout = 0.1
+
+
+class AsyncTestTask(BaseTask):
+    timeout = 0.1
+
+    async def run(self, data):
+        pass
+
+
+class TaskWorkerTest(TransactionTestCase):
+    # tasks run on pool threads of their own, which only see committed rows
+
+    def setUp(self) -> None:
+        registry.getTaskHandlers()
+        taskHandlersPatcher = patch.dict(registry.taskHandlers, {
+            TASK_NAME: SlowTestTask(),
+            'LimitedTestTask': LimitedTestTask(),
+            'TimedTestTask': TimedTestTask(),
+            'AsyncTestTask': AsyncTestTask(),
+        })
+        taskHandlersPatcher.start()
+        self.addCleanup(taskHandlersPatcher.stop)
+
+    def runOnce(self, *args):
+        call_command('tasks', '--once', *args, stdout=StringIO(), stderr=StringIO())
+
+    @patch('tasks.management.commands.tasks.CHECK_INTERVAL', 0.05)
+    def testRunOnceHeartbeatsTasksThatAreStillRunning(self):
+        task = Task.objects.create(name=TASK_NAME, data={'sleep': 0.5})
+
+        with patch.object(Task.objects, 'heartbeat', wraps=Task.objects.heartbeat) as mockHeartbeat:
+            self.runOnce()
+
+        self.assertIn([task.id], [call.args[0] for call in mockHeartbeat.call_args_list])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.COMPLETED)
+
+    @patch('tasks.management.commands.tasks.CHECK_INTERVAL', 0.05)
+    def testTimeoutCountsFromWhenTheTaskStartsRunning(self):
+        # the second task waits for the concurrency limit longer than the timeout, but runs well within it
+        for _ in range(2):
+            Task.objects.create(name='LimitedTestTask', data={'sleep': 0.3})
+
+        self.runOnce()
+
+        self.assertEqual(Task.objects.filter(status=Task.Status.COMPLETED).count(), 2)
+
+    @patch('tasks.management.commands.tasks.CHECK_INTERVAL', 0.05)
+    def testTimedOutTaskIsRetriedAndItsLateCompletionIgnored(self):
+        task = Task.objects.create(name='TimedTestTask', data={'sleep': 0.4})
+
+        self.runOnce()
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.Status.PENDING)
+        self.assertEqual(task.tries, 1)
+        self.assertIn('Timed out after 0.1s', task.lastError)
+        self.assertGreater(task.scheduledAt, timezone.now())
+
+    def testTimeoutSweepLeavesTasksOfAsyncHandlersToTheEventLoop(self):
+        Task.objects.create(name='AsyncTestTask')
+        task = Task.objects.claim(1)[0]
+        command = Command()
+        command.handlers = registry.taskHandlers
+        command.runStartedAt = {task.id: time.monotonic() - 60}
+
+        command._failTimedOutTasks({Future(): [task]})
+
+        self.assertEqual(Task.objects.get(id=task.id).status, Task.Status.RUNNING)
+
+
+class TaskSupervisorTest(TransactionTestCase):
+
+    def setUp(self) -> None:
+        for signalNumber in [signal.SIGTERM, signal.SIGINT]:
+            self.addCleanup(signal.signal, signalNumber, signal.getsignal(signalNumber))
+
+    @patch('tasks.management.commands.tasks.RESTART_DELAY', 0)
+    @patch.object(Command, '_runChild', lambda self, options, index: sys.exit(3))
+    def testSupervisorRestartsAChildThatExits(self):
+        stdout, stderr = StringIO(), StringIO()
+        command = Command(stdout=stdout, stderr=stderr)
+        command.stopEvent = threading.Event()
+        threading.Timer(2.5, command.stopEvent.set).start()
+
+        command._supervise({'processes': 1})
+
+        self.assertIn('exited with 3', stderr.getvalue())
+        self.assertGreaterEqual(stdout.getvalue().count('Worker process 0 started'), 2)